@@ -2,6 +2,7 @@ import logging
 from copy import deepcopy
 from enum import Enum
 from pathlib import Path
+from typing import NamedTuple
 
 import yaml
 
@@ -53,6 +54,737 @@ class Format(Enum):
     WOFF2 = "woff2"
 
 
+class BuildStep(NamedTuple):
+    key: str
+    name: str
+    path: Path
+    glyphs: int
+    cost: float
+
+
+class BuildTimings:
+    """Per glyph timings of build steps recorded from earlier builds, used to
+    estimate the cost of future ones."""
+
+    # Rough seconds per glyph, used for steps never timed before.
+    DEFAULTS = {
+        "compile": 0.004,
+        "subset": 0.0005,
+        "instance": 0.004,
+        "save": 0.0002,
+    }
+
+    # Rough peak memory of a font build in bytes, a fixed overhead plus an
+    # amount per glyph of each master, used for fonts never built before.
+    MEMORY = (200 * 1024**2, 20 * 1024)
+
+    # Rough extra memory per glyph of the stages after compiling the font,
+    # and of each process instantiating glyphs with --instance-jobs, used
+    # for stages never measured before.
+    STAGE_MEMORY = {
+        "instance": 20 * 1024,
+        "subset": 5 * 1024,
+        "woff": 2 * 1024,
+        "child": 10 * 1024,
+    }
+
+    def __init__(self, path):
+        import json
+
+        self.path = path
+        self.rates = {}
+        if path.exists():
+            with open(path) as f:
+                self.rates = json.load(f)
+
+    def estimate(self, key, glyphs):
+        rate = self.rates.get(key)
+        if rate is None:
+            rate = self.DEFAULTS[key.split(":")[0]]
+        return rate * glyphs
+
+    def record(self, key, glyphs, elapsed):
+        rate = elapsed / max(glyphs, 1)
+        if key in self.rates:
+            # Smooth over earlier builds.
+            rate = (self.rates[key] + rate) / 2
+        self.rates[key] = rate
+
+    def memory(self, name, glyphs):
+        peak = self.rates.get(f"memory:{name}")
+        if peak is None:
+            base, rate = self.MEMORY
+            peak = base + rate * glyphs
+        return peak
+
+    def recordmemory(self, name, peak):
+        key = f"memory:{name}"
+        if key in self.rates:
+            peak = (self.rates[key] + peak) / 2
+        self.rates[key] = peak
+
+    def stagememory(self, kind):
+        """Returns the extra memory per glyph a build stage needs over the
+        peak of compiling the font."""
+        return self.rates.get(f"memory:stage:{kind}", self.STAGE_MEMORY[kind])
+
+    def recordstagememory(self, kind, rate):
+        key = f"memory:stage:{kind}"
+        if key in self.rates:
+            rate = (self.rates[key] + rate) / 2
+        self.rates[key] = rate
+
+    def save(self):
+        import json
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "w") as f:
+            json.dump(self.rates, f, indent=2, sort_keys=True)
+
+
+class BuildProgress:
+    """Reports build progress and ETA against the planned step costs, and
+    records the actual step timings of each project."""
+
+    def __init__(self, steps, timings, metrics=None):
+        import time
+
+        self.metrics = metrics
+        self.total = sum(step.cost for step in steps)
+        self.files = len([step for step in steps if step.path])
+        self.done = 0
+        self.saved = 0
+        self.start = time.monotonic()
+        self.timings = timings
+
+    def put(self, event):
+        import time
+
+        project, name, key, glyphs, elapsed, estimate, path, size = event
+        # Steps restored from a checkpoint are not timed.
+        if elapsed is not None:
+            self.timings[project].record(key, glyphs, elapsed)
+            if self.metrics is not None:
+                self.metrics.record(project, name, key, elapsed, size)
+        self.done += estimate
+        if path is None:
+            return
+
+        self.saved += 1
+        percent = min(self.done / self.total, 1) * 100 if self.total else 0
+        message = f"Progress: {percent:.0f}% ({self.saved}/{self.files} files)"
+        if self.done:
+            spent = time.monotonic() - self.start
+            remaining = spent / self.done * max(self.total - self.done, 0)
+            message += f", ETA {formatduration(remaining)}"
+        logger.info(message)
+
+    def drain(self, queue):
+        while (event := queue.get()) is not None:
+            self.put(event)
+
+
+class MemoryBudget:
+    """The memory budget of a parallel build, shared with the worker
+    processes through a manager. Fonts are admitted with the expected peak of
+    compiling them, and their later stages reserve their expected extra
+    memory while they run. A stage waits while the projected total doesn’t
+    fit, but always runs when no other stage holds memory, so heavy stages
+    are serialized and light ones fill in around them."""
+
+    def __init__(self, manager, budget):
+        self.budget = budget
+        self.condition = manager.Condition()
+        self.fonts = manager.Value("d", 0)
+        self.stages = manager.Value("d", 0)
+
+    def admit(self, need, running):
+        """Reserves the memory of a font if it fits, or if no other font is
+        running. Returns whether the font was admitted."""
+        with self.condition:
+            used = self.fonts.value + self.stages.value
+            if running and used + need > self.budget:
+                return False
+            self.fonts.value += need
+            return True
+
+    def acquire(self, need):
+        with self.condition:
+            while self.stages.value:
+                if self.fonts.value + self.stages.value + need <= self.budget:
+                    break
+                self.condition.wait()
+            self.stages.value += need
+
+    def release(self, need, stage=True):
+        with self.condition:
+            if stage:
+                self.stages.value -= need
+            else:
+                self.fonts.value -= need
+            self.condition.notify_all()
+
+
+class StageMemory:
+    """Reserves the expected extra memory of a build stage from the memory
+    budget of the font while the stage runs, and measures how much the stage
+    raised the peak memory of the process."""
+
+    def __init__(self, font, kind, glyphs):
+        self.font = font
+        self.kind = kind
+        self.glyphs = max(glyphs, 1)
+        self.children = kind == "instance" and font.instancejobs > 1
+        self.need = font.memoryrates.get(kind, 0) * self.glyphs
+        if self.children:
+            # Each process holds the whole font.
+            rate = font.memoryrates.get("child", 0)
+            self.need += font.instancejobs * rate * self.glyphs
+
+    def __enter__(self):
+        # Stages nested in another, like WOFF flavors of instances, are
+        # covered by the memory the outer stage reserved.
+        self.reserve = (
+            self.font.budget is not None and self.need and not self.font.stagedepth
+        )
+        self.font.stagedepth += 1
+        if self.reserve:
+            self.font.budget.acquire(self.need)
+        self.peak = peakmemory()
+
+    def __exit__(self, kind, value, tb):
+        self.font.stagedepth -= 1
+        if self.reserve:
+            self.font.budget.release(self.need)
+        peak = peakmemory()
+        if peak is None:
+            return
+        peaks = self.font.memorypeaks
+        rate = (peak - self.peak) / self.glyphs
+        peaks[self.kind] = max(peaks.get(self.kind, 0), rate)
+        if self.children and (children := peakmemory(children=True)):
+            peaks["child"] = max(peaks.get("child", 0), children / self.glyphs)
+
+
+class BuildMetrics:
+    """Stage durations, cache hits, peak memory and outputs of each font in a
+    build, written in the OpenMetrics text format for textfile collectors."""
+
+    def __init__(self, path):
+        self.path = path
+        self.durations = {}
+        self.outputs = {}
+        self.caches = {}
+        self.memory = {}
+
+    def record(self, project, name, key, elapsed, size):
+        stage, fmtdir = key.split(":", 1)
+        labels = (("project", project), ("font", name), ("format", fmtdir))
+        key = labels + (("stage", stage),)
+        self.durations[key] = self.durations.get(key, 0) + elapsed
+        if size is not None:
+            count, total = self.outputs.get(labels, (0, 0))
+            self.outputs[labels] = (count + 1, total + size)
+
+    def recordfont(self, font, peak, caches):
+        labels = (("project", font.project), ("font", font.name))
+        if peak is not None:
+            self.memory[labels] = peak
+        for cache, (hits, misses) in caches.items():
+            self.caches[labels + (("cache", cache),)] = (hits, misses)
+
+    @staticmethod
+    def _sample(name, labels, value):
+        def escape(value):
+            value = str(value).replace("\\", "\\\\").replace('"', '\\"')
+            return value.replace("\n", "\\n")
+
+        if labels:
+            name += "{" + ",".join(f'{k}="{escape(v)}"' for k, v in labels) + "}"
+        return f"{name} {value}"
+
+    def save(self, elapsed):
+        metrics = [
+            (
+                "build_duration_seconds",
+                "gauge",
+                "Wall time of the build",
+                [((), elapsed)],
+            ),
+            (
+                "stage_duration_seconds",
+                "gauge",
+                "Time spent in each build stage",
+                self.durations.items(),
+            ),
+            (
+                "cache_lookups",
+                "counter",
+                "Cache lookups by result",
+                [
+                    (k + (("result", r),), v)
+                    for k, (hits, misses) in self.caches.items()
+                    for r, v in (("hit", hits), ("miss", misses))
+                ],
+            ),
+            (
+                "cache_hit_ratio",
+                "gauge",
+                "Ratio of cache lookups that were hits",
+                [(k, h / (h + m)) for k, (h, m) in self.caches.items() if h + m],
+            ),
+            (
+                "peak_memory_bytes",
+                "gauge",
+                "Peak memory of the process that built the font",
+                self.memory.items(),
+            ),
+            (
+                "output_files",
+                "gauge",
+                "Number of output files",
+                [(k, count) for k, (count, _) in self.outputs.items()],
+            ),
+            (
+                "output_bytes",
+                "gauge",
+                "Total size of the output files",
+                [(k, size) for k, (_, size) in self.outputs.items()],
+            ),
+        ]
+
+        lines = []
+        for name, kind, description, samples in metrics:
+            name = f"tirobuild_{name}"
+            lines.append(f"# TYPE {name} {kind}")
+            if name.endswith(("_seconds", "_bytes")):
+                lines.append(f"# UNIT {name} {name.rsplit('_', 1)[1]}")
+            lines.append(f"# HELP {name} {description}.")
+            sample = f"{name}_total" if kind == "counter" else name
+            lines += [self._sample(sample, k, v) for k, v in samples]
+        lines.append("# EOF")
+
+        # Written to a temporary file first, so that collectors never read a
+        # partial file.
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp = self.path.with_name(self.path.name + ".tmp")
+        temp.write_text("\n".join(lines) + "\n")
+        temp.replace(self.path)
+
+
+class Checkpoint:
+    """Intermediate artifacts of a font build, saved in a work directory so
+    that a failed build can be resumed from the last completed stage."""
+
+    def __init__(self, path, fingerprint, resume=False):
+        import json
+        import shutil
+
+        self.path = path
+        self.fingerprint = fingerprint
+        self.stages = {}
+
+        manifest = path / "checkpoint.json"
+        if resume and manifest.exists():
+            with open(manifest) as f:
+                data = json.load(f)
+            if data["fingerprint"] != fingerprint:
+                raise RuntimeError(
+                    f"Can’t resume from {path}, the configuration or inputs "
+                    "changed since the checkpoint"
+                )
+            self.stages = data["stages"]
+        else:
+            shutil.rmtree(path, ignore_errors=True)
+
+    def save(self, stage, otf=None, path=None):
+        import hashlib
+        import json
+
+        self.path.mkdir(parents=True, exist_ok=True)
+        entry = {}
+        if otf is not None:
+            # Named after the stage, so saving a stage again replaces its own
+            # file only.
+            filename = hashlib.sha1(stage.encode("utf-8")).hexdigest() + ".font"
+            otf.save(self.path / filename)
+            entry["file"] = filename
+            entry["fontRevision"] = otf["head"].fontRevision
+        if path is not None:
+            entry["path"] = str(path)
+        self.stages[stage] = entry
+
+        # Write to a temporary file first, so a crash while writing does not
+        # corrupt the manifest.
+        manifest = self.path / "checkpoint.json"
+        temp = manifest.with_suffix(".tmp")
+        with open(temp, "w") as f:
+            json.dump({"fingerprint": self.fingerprint, "stages": self.stages}, f)
+        temp.replace(manifest)
+
+    def load(self, stage):
+        entry = self.stages.get(stage)
+        if entry is None or "file" not in entry:
+            return None
+
+        from io import BytesIO
+
+        from fontTools.ttLib import TTFont
+
+        with open(self.path / entry["file"], "rb") as f:
+            otf = TTFont(BytesIO(f.read()))
+
+        # Some odd rounding happens to fontRevision when loading from binary
+        # again, so reset it.
+        otf["head"].fontRevision = entry["fontRevision"]
+        return otf
+
+    def done(self, stage):
+        entry = self.stages.get(stage)
+        return entry is not None and Path(entry["path"]).exists()
+
+    def clear(self):
+        import shutil
+
+        shutil.rmtree(self.path, ignore_errors=True)
+        if self.path.parent.exists() and not any(self.path.parent.iterdir()):
+            self.path.parent.rmdir()
+
+
+class FeatureResult:
+    """The changes feature compilation made to a font, so that they can be
+    applied to another font compiled from the same source."""
+
+    # Tables built from scratch by the feature compiler.
+    LAYOUT = ("GDEF", "GSUB", "GPOS", "BASE", "STAT")
+    # Tables the feature compiler modifies in place.
+    INPLACE = ("head", "hhea", "vhea", "OS/2")
+
+    def __init__(self, ttFont):
+        self.glyphOrder = ttFont.getGlyphOrder()
+        # Copied deeply, since the compiler might modify field values in place.
+        self.fields = {
+            t: deepcopy(ttFont[t].__dict__) for t in self.INPLACE if t in ttFont
+        }
+        self.names = self._names(ttFont)
+
+    @staticmethod
+    def _names(ttFont):
+        if "name" not in ttFont:
+            return set()
+        return {
+            (n.nameID, n.platformID, n.platEncID, n.langID, n.toUnicode())
+            for n in ttFont["name"].names
+        }
+
+    def record(self, ttFont):
+        """Records the changes made since the result was created."""
+        self.tables = {t: deepcopy(ttFont.get(t)) for t in self.LAYOUT}
+        for tag, before in self.fields.items():
+            after = ttFont[tag].__dict__
+            self.fields[tag] = {
+                k: deepcopy(v)
+                for k, v in after.items()
+                if k not in before or before[k] != v
+            }
+        self.names = self._names(ttFont) - self.names
+
+    def apply(self, ttFont):
+        for tag, table in self.tables.items():
+            if table is not None:
+                ttFont[tag] = deepcopy(table)
+            elif tag in ttFont:
+                del ttFont[tag]
+        for tag, fields in self.fields.items():
+            for key, value in fields.items():
+                setattr(ttFont[tag], key, deepcopy(value))
+        for nameID, platformID, platEncID, langID, string in self.names:
+            ttFont["name"].setName(string, nameID, platformID, platEncID, langID)
+
+
+class SharedCache:
+    """Keeps at most size entries in memory, dropping the least recently used
+    ones. Once shared, entries are also pickled to a folder, so that fonts
+    built in other processes of the same build can use them."""
+
+    def __init__(self, size):
+        self.size = size
+        self.path = None
+        self.entries = {}
+
+    def _file(self, key):
+        import hashlib
+
+        return self.path / hashlib.sha256(repr(key).encode("utf-8")).hexdigest()
+
+    def _remember(self, key, value):
+        self.entries[key] = value
+        while len(self.entries) > self.size:
+            del self.entries[next(iter(self.entries))]
+
+    def share(self, path):
+        path.mkdir(parents=True, exist_ok=True)
+        self.path = path
+
+    def get(self, key):
+        value = self.entries.pop(key, None)
+        if value is None and self.path is not None:
+            import pickle
+
+            try:
+                with open(self._file(key), "rb") as f:
+                    value = pickle.load(f)
+            except FileNotFoundError:
+                pass
+        if value is not None:
+            self._remember(key, value)
+        return value
+
+    def put(self, key, value):
+        self._remember(key, value)
+        if self.path is not None and not self._file(key).exists():
+            import os
+            import pickle
+            import tempfile
+
+            # Written to a temporary file first, since other processes might
+            # read or write the same entry at the same time.
+            with tempfile.NamedTemporaryFile(dir=self.path, delete=False) as f:
+                pickle.dump(value, f)
+            os.replace(f.name, self._file(key))
+
+
+class BuildCache:
+    """Caches of a build, shared by all the fonts built in the same process,
+    including fonts of other projects in batch builds, and by all the worker
+    processes once shared."""
+
+    # Number of entries kept in memory.
+    FEATURES_SIZE = 64
+    CU2QU_SIZE = 20000
+
+    def __init__(self):
+        # Compiled features of each source, shared between outline formats.
+        self.features = SharedCache(self.FEATURES_SIZE)
+        # Cubic to quadratic conversions, see Cu2QuCache.
+        self.cu2qu = SharedCache(self.CU2QU_SIZE)
+
+    def share(self, path):
+        """Shares the caches with other processes through the given folder,
+        which must outlive the build."""
+        self.features.share(path / "features")
+        self.cu2qu.share(path / "cu2qu")
+
+
+def sharedFeatureCompiler(cache, count=None):
+    """Returns a ufo2ft feature compiler class that compiles the features of
+    each source once, and reuses the result when the same source is compiled
+    again to another outline format. count is called with whether each
+    compilation was reused."""
+    from ufo2ft.featureCompiler import FeatureCompiler
+
+    class SharedFeatureCompiler(FeatureCompiler):
+        def compile(self):
+            # Fonts of other projects might use the same source with other
+            # feature writers or writer options.
+            writers = tuple(
+                (type(w).__name__, repr(sorted(vars(w.options).items())))
+                for w in self.featureWriters
+            )
+            key = None
+            if self.ufo.path:
+                path = str(Path(self.ufo.path).resolve())
+                key = (path, self.ufo.features.text, writers)
+            result = cache.get(key) if key is not None else None
+            hit = result and result.glyphOrder == self.ttFont.getGlyphOrder()
+            if count is not None:
+                count(bool(hit))
+            if hit:
+                logger.info(f"Reusing compiled features of {Path(key[0]).name}")
+                result.apply(self.ttFont)
+                return self.ttFont
+
+            result = FeatureResult(self.ttFont)
+            super().compile()
+            if key is not None:
+                result.record(self.ttFont)
+                cache.put(key, result)
+            return self.ttFont
+
+    return SharedFeatureCompiler
+
+
+class Cu2QuCache:
+    """Quadratic outlines converted from cubic ones by earlier builds, keyed
+    by the hash of the cubic outlines of a glyph in all masters and the
+    conversion options. Only the entries used by the last build are kept.
+    Entries are also shared with the other fonts of the build, see
+    BuildCache."""
+
+    def __init__(self, path, shared=None, count=None):
+        import json
+
+        self.path = path
+        self.entries = {}
+        self.used = {}
+        self.shared = shared
+        self.count = count
+        if path.exists():
+            with open(path) as f:
+                self.entries = json.load(f)
+
+    @staticmethod
+    def _contours(glyph):
+        return [
+            [
+                c.identifier,
+                [[p.x, p.y, p.type, p.smooth, p.name, p.identifier] for p in c],
+            ]
+            for c in glyph.contours
+        ]
+
+    def convert(self, glyphs, options, convert):
+        """Converts the glyphs by calling convert, unless their conversion is
+        cached. Returns whether the glyphs were modified."""
+        import hashlib
+        import json
+
+        data = json.dumps([options, [self._contours(g) for g in glyphs]])
+        key = hashlib.sha256(data.encode("utf-8")).hexdigest()
+        entry = self.entries.get(key)
+        if entry is None and self.shared is not None:
+            entry = self.shared.get(key)
+        if self.count is not None:
+            self.count(entry is not None)
+        if entry is None:
+            modified = convert()
+            entry = [modified, [self._contours(g) for g in glyphs]]
+        else:
+            for glyph, contours in zip(glyphs, entry[1]):
+                glyph.clearContours()
+                pen = glyph.getPointPen()
+                for identifier, points in contours:
+                    pen.beginPath(identifier=identifier)
+                    for x, y, segmentType, smooth, name, pointId in points:
+                        pen.addPoint(
+                            (x, y), segmentType, smooth, name, identifier=pointId
+                        )
+                    pen.endPath()
+        self.used[key] = entry
+        if self.shared is not None:
+            self.shared.put(key, entry)
+        return entry[0]
+
+    def save(self):
+        import json
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "w") as f:
+            json.dump(self.used, f)
+
+
+def cachedCu2QuPreProcessor(cache, interpolatable):
+    """Returns a ufo2ft TTF pre-processor class that reuses cached cubic to
+    quadratic conversions of glyphs whose outlines did not change."""
+    from ufo2ft.filters.cubicToQuadratic import CubicToQuadraticFilter
+    from ufo2ft.preProcessor import TTFInterpolatablePreProcessor, TTFPreProcessor
+
+    if interpolatable:
+
+        class CachedPreProcessor(TTFInterpolatablePreProcessor):
+            def process(self):
+                from fontTools.cu2qu.errors import IncompatibleGlyphsError
+                from fontTools.cu2qu.ufo import (
+                    IncompatibleFontsError,
+                    glyphs_to_quadratic,
+                )
+
+                # Custom post-filters run after the conversion, so leave it
+                # to ufo2ft then.
+                if not self.convertCubics or any(any(f) for f in self.postFilters):
+                    return super().process()
+
+                # Components flattening, the only default filter after the
+                # conversion, does not touch contours, so converting last
+                # gives the same result.
+                reverse = self._reverseDirection
+                self.convertCubics = self._reverseDirection = False
+                super().process()
+                self.convertCubics, self._reverseDirection = True, reverse
+
+                modified = False
+                errors = {}
+                for name in set().union(*(g.keys() for g in self.glyphSets)):
+                    glyphs = []
+                    maxErrors = []
+                    for glyphSet, error in zip(self.glyphSets, self._conversionErrors):
+                        if name in glyphSet:
+                            glyphs.append(glyphSet[name])
+                            maxErrors.append(error)
+                    options = [maxErrors, reverse, self.allQuadratic]
+                    try:
+                        modified |= cache.convert(
+                            glyphs,
+                            options,
+                            lambda: glyphs_to_quadratic(
+                                glyphs, maxErrors, reverse, {}, self.allQuadratic
+                            ),
+                        )
+                    except IncompatibleGlyphsError as e:
+                        errors[name] = e
+                if errors:
+                    raise IncompatibleFontsError(errors)
+                if modified:
+                    self._update_instantiator()
+                return self.glyphSets
+
+        return CachedPreProcessor
+
+    class CachedFilter(CubicToQuadraticFilter):
+        def filter(self, glyph):
+            if not len(glyph):
+                return False
+            options = [
+                self.context.absoluteError,
+                self.options.reverseDirection,
+                self.options.allQuadratic,
+            ]
+            return cache.convert(
+                [glyph], options, lambda: CubicToQuadraticFilter.filter(self, glyph)
+            )
+
+    class CachedPreProcessor(TTFPreProcessor):
+        def initDefaultFilters(self, **kwargs):
+            filters = super().initDefaultFilters(**kwargs)
+            for i, f in enumerate(filters):
+                if type(f) is CubicToQuadraticFilter:
+                    filters[i] = CachedFilter(**f.options.__dict__)
+            return filters
+
+    return CachedPreProcessor
+
+
+def fontDigest(data, *extra):
+    """Returns a digest of compiled font data and extra values, ignoring the
+    font timestamps and checksum, so that compiling the same font again gives
+    the same digest."""
+    import hashlib
+    from io import BytesIO
+
+    from fontTools.ttLib.sfnt import SFNTReader
+
+    digest = hashlib.sha256(repr(extra).encode("utf-8"))
+    reader = SFNTReader(BytesIO(data))
+    for tag in sorted(reader.keys()):
+        table = reader[tag]
+        if tag == "head":
+            table = table[:8] + table[12:20] + table[36:]
+        digest.update(tag.encode("latin-1"))
+        digest.update(len(table).to_bytes(4, "big"))
+        digest.update(table)
+    return digest.hexdigest()
+
+
 def getName(font, nameID):
     name = font["name"].getName(nameID, platformID=3, platEncID=1, langID=0x409)
     if name:
@@ -64,14 +796,28 @@ def setName(font, nameID, string):
     font["name"].setName(string, nameID, platformID=3, platEncID=1, langID=0x409)
 
 
+def axisLimits(coordinates):
+    """Returns the instance coordinates with axis ranges, given as lists of
+    minimum and maximum or minimum, default and maximum, as tuples."""
+    return {k: tuple(v) if isinstance(v, list) else v for k, v in coordinates.items()}
+
+
+def isPartial(coordinates):
+    return any(isinstance(v, (list, tuple)) for v in coordinates.values())
+
+
 def instanceMatch(key, instance, font):
     psname = getName(font, instance.postscriptNameID)
+    subfamily = getName(font, instance.subfamilyNameID)
+    return instanceNamesMatch(key, psname, subfamily)
+
+
+def instanceNamesMatch(key, psname, subfamily):
     if key == psname:
         return True
-    subfamily = getName(font, instance.subfamilyNameID)
     if key == subfamily:
         return True
-    if "-" in key:
+    if "-" in key and subfamily:
         part = key.split("-", 1)[1]
         if subfamily == part:
             return True
@@ -80,15 +826,90 @@ def instanceMatch(key, instance, font):
     return False
 
 
-def instanceName(name, instance, font):
+def instanceName(name, instance, font, usepsname=True):
     psname = getName(font, instance.postscriptNameID)
-    if psname:
+    if psname and usepsname:
         return psname
 
     subfamily = getName(font, instance.subfamilyNameID)
     return name.split("-")[0] + "-" + subfamily
 
 
+def formatduration(seconds):
+    seconds = max(0, seconds)
+    if seconds < 60:
+        return f"{seconds:.1f}s"
+    minutes, seconds = divmod(int(seconds), 60)
+    if minutes < 60:
+        return f"{minutes}m{seconds:02}s"
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h{minutes:02}m"
+
+
+def formatsize(size):
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f}{unit}"
+        size /= 1024
+    return f"{size:.1f}GB"
+
+
+def parsesize(string):
+    """Parses a size like “512M” or “16G” into bytes."""
+    units = {"K": 1024, "M": 1024**2, "G": 1024**3}
+    number = string.strip().upper().removesuffix("B")
+    scale = units.get(number[-1:], 1)
+    if number[-1:] in units:
+        number = number[:-1]
+    try:
+        return int(float(number) * scale)
+    except ValueError:
+        raise ValueError(f"Invalid size: “{string}”")
+
+
+def peakmemory(children=False):
+    """Returns the peak memory of this process, or with `children` of the
+    largest of its finished child processes, in bytes, or None if it can’t
+    be measured."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    import sys
+
+    # ru_maxrss is in bytes on macOS, and in kilobytes elsewhere.
+    scale = 1 if sys.platform == "darwin" else 1024
+    who = resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF
+    return resource.getrusage(who).ru_maxrss * scale
+
+
+def countglyphs(path):
+    import plistlib
+
+    with open(path / "glyphs" / "contents.plist", "rb") as f:
+        return len(plistlib.load(f))
+
+
+def ufoglyphnames(path):
+    """Returns the glyph names of the UFO and its PostScript names mapping,
+    without loading the glyphs."""
+    import plistlib
+
+    with open(path / "glyphs" / "contents.plist", "rb") as f:
+        glyphnames = list(plistlib.load(f))
+    psnames = {}
+    if (path / "lib.plist").exists():
+        with open(path / "lib.plist", "rb") as f:
+            psnames = plistlib.load(f).get(PSNAMES_KEY, {})
+    return glyphnames, psnames
+
+
+def validateversion(string):
+    import re
+
+    return re.match(r"Version (\d\.\d\d)", string) is not None
+
+
 def mergeConfigs(first, second, skip=None):
     conf = {**first}
     for key in second:
@@ -221,11 +1042,112 @@ def run_tx(otf, options, outTag=None):
     return otf
 
 
-def instantiateCFF2(otf, coordinates):
-    from fontTools.varLib.mutator import interpolate_cff2_metrics
+def normalizedLocation(otf, coordinates):
     from fontTools.misc.fixedTools import floatToFixedToFloat
     from fontTools.varLib.models import normalizeLocation, piecewiseLinearMap
 
+    fvarAxes = otf["fvar"].axes
+    axes = {a.axisTag: (a.minValue, a.defaultValue, a.maxValue) for a in fvarAxes}
+    loc = normalizeLocation(coordinates, axes)
+    if "avar" in otf:
+        maps = otf["avar"].segments
+        loc = {k: piecewiseLinearMap(v, maps[k]) for k, v in loc.items()}
+    # Quantize to F2Dot14, to avoid surprise interpolations.
+    return {k: floatToFixedToFloat(v, 14) for k, v in loc.items()}
+
+
+def instantiateGlyphChunk(data, loc, glyphnames):
+    """Applies the gvar deltas at the normalized location to the given glyphs
+    of the font in data, returning their coordinates, including phantom
+    points. Each glyph only depends on its own outline and metrics, so
+    chunks can be computed independently."""
+    from io import BytesIO
+
+    from fontTools.ttLib import TTFont
+    from fontTools.ttLib.tables._g_l_y_f import GlyphCoordinates
+    from fontTools.varLib.iup import iup_delta
+    from fontTools.varLib.models import supportScalar
+
+    otf = TTFont(BytesIO(data))
+    gvar = otf["gvar"]
+    glyf = otf["glyf"]
+    hMetrics = otf["hmtx"].metrics
+    vMetrics = getattr(otf.get("vmtx"), "metrics", None)
+
+    # Same as fontTools.varLib.mutator.instantiateVariableFont().
+    result = []
+    for glyphname in glyphnames:
+        coordinates, g = glyf._getCoordinatesAndControls(glyphname, hMetrics, vMetrics)
+        origCoords = None
+        for var in gvar.variations[glyphname]:
+            scalar = supportScalar(loc, var.axes)
+            if not scalar:
+                continue
+            delta = var.coordinates
+            if None in delta:
+                if origCoords is None:
+                    origCoords, g = glyf._getCoordinatesAndControls(
+                        glyphname, hMetrics, vMetrics
+                    )
+                delta = iup_delta(delta, origCoords, g.endPts)
+            coordinates += GlyphCoordinates(delta) * scalar
+        result.append((glyphname, list(coordinates)))
+    return result
+
+
+def instantiateGvar(otf, coordinates, jobs):
+    """Applies the gvar deltas in chunks of glyphs in parallel processes, then
+    sets the new coordinates and metrics in glyf/hmtx/vmtx in the same order
+    fontTools does, so the result is identical. The gvar variations are
+    emptied, and the rest of the font is left to instantiateVariableFont()."""
+    from concurrent.futures import ProcessPoolExecutor
+    from io import BytesIO
+
+    from fontTools.ttLib.tables._g_l_y_f import GlyphCoordinates
+
+    gvar = otf["gvar"]
+    glyf = otf["glyf"]
+    hMetrics = otf["hmtx"].metrics
+    vMetrics = getattr(otf.get("vmtx"), "metrics", None)
+
+    # Composite glyph bounds depend on their components, so glyphs are set in
+    # order of component depth.
+    glyphnames = sorted(
+        gvar.variations.keys(),
+        key=lambda name: (
+            (
+                glyf[name].getCompositeMaxpValues(glyf).maxComponentDepth
+                if glyf[name].isComposite()
+                else 0
+            ),
+            name,
+        ),
+    )
+
+    stream = BytesIO()
+    otf.save(stream)
+    data = stream.getvalue()
+    loc = normalizedLocation(otf, coordinates)
+
+    size = -(-len(glyphnames) // jobs)
+    chunks = [glyphnames[i : i + size] for i in range(0, len(glyphnames), size)]
+    with ProcessPoolExecutor(min(jobs, len(chunks))) as executor:
+        futures = [
+            executor.submit(instantiateGlyphChunk, data, loc, chunk) for chunk in chunks
+        ]
+        for future in futures:
+            for glyphname, coords in future.result():
+                glyf._setCoordinates(
+                    glyphname, GlyphCoordinates(coords), hMetrics, vMetrics
+                )
+
+    gvar.variations = {}
+    return otf
+
+
+def instantiateCFF2(otf, coordinates):
+    from fontTools.varLib.mutator import interpolate_cff2_metrics
+
     # instantiate the CFF2 table using tx, since FontTools.varLib mutator
     # produces broken glyphs.
     coords = ",".join(str(v) for v in coordinates.values())
@@ -249,14 +1171,7 @@ def instantiateCFF2(otf, coordinates):
     topDict.version = f"{otf["head"].fontRevision}"
 
     glyphOrder = otf.getGlyphOrder()
-    fvarAxes = otf["fvar"].axes
-    axes = {a.axisTag: (a.minValue, a.defaultValue, a.maxValue) for a in fvarAxes}
-    loc = normalizeLocation(coordinates, axes)
-    if "avar" in otf:
-        maps = otf["avar"].segments
-        loc = {k: piecewiseLinearMap(v, maps[k]) for k, v in loc.items()}
-    # Quantize to F2Dot14, to avoid surprise interpolations.
-    loc = {k: floatToFixedToFloat(v, 14) for k, v in loc.items()}
+    loc = normalizedLocation(otf, coordinates)
     interpolate_cff2_metrics(otf, topDict, glyphOrder, loc)
 
     # Set post table version to 3.0.
@@ -278,6 +1193,7 @@ class Font:
         self.ttf = conf.get("ttf", {})
 
         path = conf["path"]
+        self.project = path
         self.output = path.parent / "output" / path.stem
 
         if self.source is None:
@@ -286,6 +1202,9 @@ class Font:
         self.source = path.parent / self.source
         self.ren = path.parent / self.ren if self.ren else None
 
+        # Input files, other than the sources, that affect the build output.
+        self.inputs = [self.ren] if self.ren else []
+
         self.variable = self.source.suffix == ".designspace"
         self.suffix = conf.get("vf-suffix")
 
@@ -294,22 +1213,43 @@ class Font:
                 if not isinstance(self.ttf["source"], list):
                     raise RuntimeError("TTF source must be a list for variable fonts")
                 self.ttf["source"] = [path.parent / p for p in self.ttf["source"]]
+                self.inputs += self.ttf["source"]
             else:
                 if isinstance(self.ttf["source"], list):
                     raise RuntimeError("TTF source must not be a list for static fonts")
                 self.ttf["source"] = path.parent / self.ttf["source"]
+                self.inputs.append(self.ttf["source"])
+
+        self.volt = conf.get("volt", {})
+        if "source" in self.volt:
+            if self.variable:
+                if not isinstance(self.volt["source"], list):
+                    raise RuntimeError("VOLT source must be a list for variable fonts")
+                self.volt["source"] = [path.parent / p for p in self.volt["source"]]
+                self.inputs += self.volt["source"]
+            else:
+                if isinstance(self.volt["source"], list):
+                    raise RuntimeError(
+                        "VOLT source must not be a list for static fonts"
+                    )
+                self.volt["source"] = path.parent / self.volt["source"]
+                self.inputs.append(self.volt["source"])
 
         self.subsets = {}
         for name, subset in conf.get("subsets", {}).items():
             if "glyphlist" not in subset:
                 raise RuntimeError(f"Subset “{name}” did not provide a glyph list")
+            self.inputs.append(path.parent / subset["glyphlist"])
             glyphlist, tags = self._parsesubset(path.parent / subset["glyphlist"])
             subset["glyphlist"] = glyphlist
             subset["langsys"] = tags
             if "cmapoverride" in subset:
+                self.inputs.append(path.parent / subset["cmapoverride"])
                 subset["cmapoverride"] = self._parsecmapoverride(
                     path.parent / subset["cmapoverride"]
                 )
+            if subset.get("instances") == "all":
+                subset["instances"] = {}
             self.subsets[name] = mergeConfigs(subset, conf, skip=["instances"])
 
         self.names = conf.get("names", {})
@@ -361,6 +1301,46 @@ class Font:
         self.autohinting = conf.get("autohinting", {})
         self.gasp = conf.get("gasp", {})
 
+        # Build progress reporting and checkpoints, see buildprojects().
+        self.progress = None
+        self.estimates = {}
+        self._clock = None
+        self.resume = False
+        self.checkpointing = False
+        self.checkpoint = None
+
+        # Number of processes to apply gvar deltas of each instance with.
+        self.instancejobs = 1
+
+        # The memory budget shared with fonts built in parallel, the expected
+        # extra memory per glyph of each kind of stage, the measured one, and
+        # the number of stages running, see MemoryBudget and StageMemory.
+        self.budget = None
+        self.memoryrates = {}
+        self.memorypeaks = {}
+        self.stagedepth = 0
+
+        # In-memory caches, shared with other fonts in the same process, and
+        # the hits and misses of all caches while building this font.
+        self.cache = BuildCache()
+        self.cachestats = {}
+        self._glyphnames = None
+
+        # Compiled data of fonts still being built, by font id, see _compile().
+        self._compiled = {}
+
+        # Finished static instances, for deriving subset instances from, and
+        # how many subset instances will still be derived from each.
+        self._statics = {}
+        self._derived = {}
+
+        # Whether to write the outputs to disk, a queue to put the (target,
+        # data) of each output on as it is saved, and an event to stop the
+        # build at the next output when set, see buildproject().
+        self.write = True
+        self.results = None
+        self.stop = None
+
     @property
     def ext(self):
         return self.fmt.value
@@ -369,6 +1349,290 @@ class Font:
     def filename(self):
         return self.name + "." + self.ext
 
+    def _sourcepath(self, path):
+        path = Path(path)
+        if not path.exists() and self.variable:
+            path = self.source.parent / path.name
+        return path
+
+    def _sourceinfo(self):
+        """Returns the glyph count of the default source and the number of
+        masters, without loading the sources."""
+        if not self.variable:
+            return countglyphs(self.source), 1
+
+        from fontTools.designspaceLib import DesignSpaceDocument
+
+        ds = DesignSpaceDocument.fromfile(self.source)
+        path = self._sourcepath(ds.findDefault().path)
+        return countglyphs(path), len(ds.sources)
+
+    def _glyphset(self, ds=None):
+        """Returns the final glyph names of the default source, without
+        loading the sources."""
+        path = self.source
+        if ds is not None:
+            path = self._sourcepath(ds.findDefault().path)
+        glyphnames, psnames = ufoglyphnames(path)
+        if self.ren is not None:
+            psnames = self._parseren()
+        if not psnames:
+            return set(glyphnames)
+        return {psnames.get(n) or n for n in glyphnames}
+
+    def preflight(self):
+        """Checks the configuration against the glyph set, axes and named
+        instances of the sources, without compiling anything. Returns a list
+        of error messages."""
+        errors = []
+        ds = None
+        if self.variable:
+            from fontTools.designspaceLib import DesignSpaceDocument
+
+            ds = DesignSpaceDocument.fromfile(self.source)
+        glyphset = self._glyphset(ds)
+
+        def checknames(names, where):
+            if 5 in names and not validateversion(names[5]):
+                errors.append(
+                    f"{where}: “{names[5]}” is not a valid version string, "
+                    "it must start with “Version X.YY”"
+                )
+
+        def checkinstances(instances, where):
+            # Instances of static fonts are ignored.
+            if not instances or not self.variable:
+                return
+            axes = {a.tag: a for a in ds.axes}
+            for key, conf in instances.items():
+                conf = conf if isinstance(conf, dict) else {}
+                checknames(conf.get("names", {}), f"{where}, instance “{key}”")
+                if "coordinates" not in conf:
+                    if not any(
+                        instanceNamesMatch(key, i.postScriptFontName, i.styleName)
+                        for i in ds.instances
+                    ):
+                        errors.append(
+                            f"{where}: instance “{key}” matches no named instance"
+                        )
+                    continue
+                for tag, value in conf["coordinates"].items():
+                    axis = axes.get(tag)
+                    values = value if isinstance(value, list) else [value]
+                    if axis is None:
+                        errors.append(
+                            f"{where}: instance “{key}” has unknown axis “{tag}”"
+                        )
+                    elif (isinstance(value, list) and len(value) not in (2, 3)) or (
+                        values != sorted(values)
+                    ):
+                        errors.append(
+                            f"{where}: instance “{key}” “{tag}” range {value} "
+                            "must be [minimum, maximum] or [minimum, default, maximum]"
+                        )
+                    elif hasattr(axis, "values"):
+                        # Discrete axes (designspace 5) have no range.
+                        if any(v not in axis.values for v in values):
+                            errors.append(
+                                f"{where}: instance “{key}” “{tag}” value {value} "
+                                f"is not one of the axis values {axis.values}"
+                            )
+                    elif not axis.minimum <= values[0] <= values[-1] <= axis.maximum:
+                        errors.append(
+                            f"{where}: instance “{key}” “{tag}” value {value} "
+                            f"is outside the axis range {axis.minimum}–{axis.maximum}"
+                        )
+
+        checknames(self.names, self.name)
+        checkinstances(self.instances, self.name)
+        for name, subset in self.subsets.items():
+            if subset.get("names", {}) != self.names:
+                checknames(subset.get("names", {}), name)
+            checkinstances(subset.get("instances"), name)
+            for code, glyphname in subset.get("cmapoverride", {}).items():
+                if glyphname not in glyphset:
+                    errors.append(
+                        f"{name}: glyph “{glyphname}” used in “cmap” override "
+                        f"for U+{code:04X} is not in the font"
+                    )
+                elif glyphname not in subset["glyphlist"]:
+                    # It might still be kept as a component of another glyph.
+                    logger.warning(
+                        f"{name}: glyph “{glyphname}” used in “cmap” override "
+                        "is not in the subset glyph list"
+                    )
+        return errors
+
+    def _fingerprint(self):
+        """Returns a hash of the project configuration and all input files."""
+        import hashlib
+
+        paths = [self.project, self.source, *self.inputs]
+        if self.variable:
+            from fontTools.designspaceLib import DesignSpaceDocument
+
+            ds = DesignSpaceDocument.fromfile(self.source)
+            paths += [self._sourcepath(s.path) for s in ds.sources]
+
+        digest = hashlib.sha256()
+        for path in paths:
+            files = [path]
+            if path.is_dir():
+                files = sorted(p for p in path.rglob("*") if p.is_file())
+            for file in files:
+                digest.update(str(file).encode())
+                digest.update(file.read_bytes())
+        return digest.hexdigest()
+
+    def _stage(self, kind):
+        fmtdir, _ = self._path()
+        return f"{kind}:{fmtdir}:{self.name}"
+
+    def _checkpoint(self, kind, otf=None):
+        if self.checkpoint is None:
+            return
+        path = self._path()[1] if otf is None else None
+        self.checkpoint.save(self._stage(kind), otf, path)
+
+    def _restore(self, kind):
+        if self.checkpoint is None:
+            return None
+        otf = self.checkpoint.load(self._stage(kind))
+        if otf is not None:
+            logger.info(f"Resuming {self.filename} from “{kind}” checkpoint")
+        return otf
+
+    def _resumed(self):
+        if self.checkpoint is None or not self.checkpoint.done(self._stage("done")):
+            return False
+        logger.info(f"Skipping {self.filename}, already built")
+        return True
+
+    def _instancenames(self, subset=False):
+        if isinstance(self.instances, dict) and self.instances:
+            return list(self.instances.keys())
+
+        from fontTools.designspaceLib import DesignSpaceDocument
+
+        names = []
+        for instance in DesignSpaceDocument.fromfile(self.source).instances:
+            if instance.postScriptFontName and not subset:
+                names.append(instance.postScriptFontName)
+            elif instance.styleName:
+                name = self.name.split("-")[0] + "-" + instance.styleName
+                names.append(name.replace(" ", ""))
+        return names
+
+    def _step(self, kind, glyphs, timings, wfmt=None):
+        fmtdir, path = self._path(wfmt)
+        key = f"{kind}:{fmtdir}"
+        path = path if kind in ("instance", "save") else None
+        return BuildStep(key, self.name, path, glyphs, timings.estimate(key, glyphs))
+
+    def _planoutput(self, glyphs, timings, kind="save"):
+        steps = [self._step(kind, glyphs, timings)]
+        for fmt in self.formats:
+            if fmt in (Format.WOFF, Format.WOFF2):
+                steps.append(self._step("save", glyphs, timings, fmt))
+        return steps
+
+    def _planinstances(self, glyphs, timings, subset=False):
+        if self.instances is None or not self.variable:
+            return []
+
+        steps = []
+        for name in self._instancenames(subset):
+            conf = self.instances.get(name) if self.instances else None
+            conf = conf if isinstance(conf, dict) else {}
+            with SaveState(self):
+                self.name = name
+                self.variable = isPartial(conf.get("coordinates", {}))
+                steps += self._planoutput(glyphs, timings, "instance")
+        return steps
+
+    def plan(self, timings):
+        """Expands the font configuration into the list of build steps, in
+        build order, with their estimated cost."""
+        glyphs, masters = self._sourceinfo()
+
+        if self.variable:
+            formats = [f for f in self.formats if f in (Format.TTF, Format.OTF)]
+        else:
+            formats = [Format.TTF, Format.OTF]
+
+        steps = []
+        with SaveState(self):
+            for fmt in formats:
+                self.fmt = fmt
+                steps.append(self._step("compile", glyphs * masters, timings))
+                if self.variable:
+                    steps += self._planinstances(glyphs, timings)
+                for name, subset in self.subsets.items():
+                    with SaveState(self):
+                        self.name = name
+                        self.instances = subset.get("instances")
+                        count = min(len(subset["glyphlist"]), glyphs)
+                        steps.append(self._step("subset", count, timings))
+                        steps += self._planinstances(count, timings, True)
+                        steps += self._planoutput(count, timings)
+                steps += self._planoutput(glyphs, timings)
+        return steps
+
+    def memory(self, timings):
+        """Returns the expected peak memory of compiling the font, the later
+        stages are expected to need more, see StageMemory."""
+        glyphs, masters = self._sourceinfo()
+        return timings.memory(self.name, glyphs * masters)
+
+    def _tick(self, kind, glyphs, path=None, wfmt=None, size=None, ran=True):
+        import time
+
+        now = time.monotonic()
+        elapsed = now - self._clock if ran else None
+        self._clock = now
+        if self.progress is None:
+            return
+
+        fmtdir, _ = self._path(wfmt)
+        key = f"{kind}:{fmtdir}"
+        estimate = self.estimates.get((key, self.name), 0)
+        path = str(path) if path else None
+        event = (self.project, self.name, key, glyphs, elapsed, estimate, path, size)
+        self.progress.put(event)
+
+    def _compilememory(self, compiled):
+        # The peak of compiling the font, which the font is admitted to a
+        # parallel build with.
+        if compiled and (peak := peakmemory()):
+            peaks = self.memorypeaks
+            peaks["compile"] = max(peaks.get("compile", 0), peak)
+
+    def _countcache(self, cache, hit):
+        hits, misses = self.cachestats.get(cache, (0, 0))
+        self.cachestats[cache] = (hits + hit, misses + (not hit))
+
+    def _cached(self, cache, digest, compile):
+        """Returns the data cached under the digest in the named cache of the
+        output folder, or the data returned by compile, caching it."""
+        path = self.output / ".cache" / cache / digest
+        self._countcache(cache, path.exists())
+        if path.exists():
+            logger.info(f"Using cached “{cache}” data for {self.filename}")
+            return path.read_bytes()
+
+        data = compile()
+        if self.write:
+            import os
+            import tempfile
+
+            # Written to a temporary file first, since parallel builds might
+            # compile the same data at the same time.
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with tempfile.NamedTemporaryFile(dir=path.parent, delete=False) as f:
+                f.write(data)
+            os.replace(f.name, path)
+        return data
+
     def _parsesubset(self, path):
         with open(path) as f:
             lines = f.read().split("\n")
@@ -402,22 +1666,27 @@ class Font:
 
         return override
 
-    def _openufo(self, path, dspath=None):
+    def _parseren(self):
+        # Parsed once per build, and shared by all masters.
+        if self._glyphnames is None:
+            with open(self.ren, "r") as f:
+                lines = f.read().split("\n")
+                lines = [
+                    line.split() for line in lines if line and not line.startswith("%")
+                ]
+                self._glyphnames = {line[0]: line[1] for line in lines}
+        return self._glyphnames
+
+    def _openufo(self, path):
         from ufoLib2 import Font as UFOFont
 
-        if not path.exists() and dspath is not None:
-            path = dspath.parent / path.name
+        path = self._sourcepath(path)
 
         ufo = UFOFont.open(path, validate=False)
 
         if self.ren is not None:
-            with open(self.ren, "r") as f:
-                logger.info(f"Setting {path.name} final glyph names")
-                lines = f.read().split("\n")
-                lines = [
-                    line.split() for line in lines if line and not line.startswith("%")
-                ]
-                ufo.lib[PSNAMES_KEY] = {line[0]: line[1] for line in lines}
+            logger.info(f"Setting {path.name} final glyph names")
+            ufo.lib[PSNAMES_KEY] = {**self._parseren()}
 
         if "fstype" in self.set:
             ufo.info.openTypeOS2Type = self.set["fstype"]
@@ -442,6 +1711,7 @@ class Font:
         from fontTools.ttLib.tables import otTables
 
         logger.info(f"Adding “featureParams” to {self.filename}")
+        self._touch(otf, "name", "GSUB")
         name = otf["name"]
 
         def addName(string):
@@ -496,6 +1766,7 @@ class Font:
                     feature.FeatureParams = params
 
     def _setstat(self, font):
+        self._touch(font, "STAT", "name")
         if self.STAT:
             from fontTools.otlLib.builder import buildStatTable
 
@@ -523,25 +1794,107 @@ class Font:
 
         return otf
 
+    def _compilevolt(self, otf, path):
+        """Compiles the OTL tables of a VOLT project, or of the “TSIV” table
+        of a font saved from VOLT, into the font. The compiled tables are
+        cached by the hash of the project and the font glyph order."""
+        import hashlib
+        from io import BytesIO, StringIO
+
+        from fontTools.otlLib.maxContextCalc import maxCtxFont
+        from fontTools.ttLib import TTFont, TTLibError, newTable
+
+        tables = self.volt.get("tables", ["GDEF", "GSUB", "GPOS"])
+        with open(path, "rb") as f:
+            data = f.read()
+
+        digest = hashlib.sha256(data)
+        digest.update("\n".join(tables + otf.getGlyphOrder()).encode("utf-8"))
+        cache = self.output / ".cache" / "volt" / digest.hexdigest()
+
+        self._countcache("volt", cache.exists())
+        if cache.exists():
+            logger.info(f"Using cached VOLT tables for {self.filename}")
+            compiled = {}
+            for tag in tables:
+                if (cache / tag).exists():
+                    compiled[tag] = (cache / tag).read_bytes()
+        else:
+            from fontTools.feaLib.builder import addOpenTypeFeaturesFromString
+            from fontTools.voltLib.voltToFea import VoltToFea
+
+            logger.info(f"Compiling VOLT tables for {self.filename}")
+            try:
+                # Glyph names in the “TSIV” table are mapped to the names in
+                # the font it was saved in.
+                font = TTFont(BytesIO(data))
+                if "TSIV" not in font:
+                    raise RuntimeError(f"“TSIV” table is missing from: {path}")
+                project = StringIO(font["TSIV"].data.decode("utf-8"))
+            except TTLibError:
+                font = None
+                project = StringIO(data.decode("utf-8"))
+
+            with TemporaryLogLevel(logging.ERROR):
+                fea = VoltToFea(project, font).convert(tables)
+            addOpenTypeFeaturesFromString(otf, fea, tables=tables)
+            compiled = {tag: otf[tag].compile(otf) for tag in tables if tag in otf}
+
+            if self.write:
+                import shutil
+                import tempfile
+
+                # Written to a unique temporary folder first, since parallel
+                # builds might compile the same project at the same time.
+                cache.parent.mkdir(parents=True, exist_ok=True)
+                temp = Path(tempfile.mkdtemp(dir=cache.parent))
+                for tag, table in compiled.items():
+                    (temp / tag).write_bytes(table)
+                try:
+                    temp.rename(cache)
+                except OSError:
+                    shutil.rmtree(temp)
+                    if not cache.exists():
+                        raise
+
+        # Tables are always loaded from their compiled data, so that fresh and
+        # cached ones are the same.
+        for tag in tables:
+            if tag in compiled:
+                otf[tag] = newTable(tag)
+                otf[tag].decompile(compiled[tag], otf)
+            elif tag in otf:
+                del otf[tag]
+
+        otf["OS/2"].usMaxContext = maxCtxFont(otf)
+
+        return otf
+
     def _setmeta(self, otf):
         if self.meta:
             from fontTools.ttLib import newTable
 
             logger.info(f"Adding “meta” table to {self.filename}")
+            self._touch(otf, "meta")
             otf["meta"] = meta = newTable("meta")
             meta.data = {t: ",".join(v) for t, v in self.meta.items()}
 
-    def _postprocess(self, otf):
+    def _setdsig(self, otf):
         if self.DSIG:
             from fontTools.ttLib import newTable
 
             logger.info(f"Adding “DSIG” table to {self.filename}")
+            self._touch(otf, "DSIG")
             otf["DSIG"] = DSIG = newTable("DSIG")
             DSIG.ulVersion = 1
             DSIG.usFlag = 0
             DSIG.usNumSigs = 0
             DSIG.signatureRecords = []
 
+        return otf
+
+    def _postprocess(self, otf):
+        otf = self._setdsig(otf)
         self._setmeta(otf)
         self._setstat(otf)
 
@@ -551,17 +1904,17 @@ class Font:
         if self.variable:
             return otf
 
+        from io import BytesIO
+
         from fontTools.ttLib import TTFont
 
+        # Hinted fonts are cached by the digest of the unhinted font and the
+        # hinting options, see _cached().
         if self.fmt == Format.TTF:
             conf = self.autohinting.get("ttfautohint", {})
             if conf.get("disable"):
                 return otf
 
-            logger.info(f"Autohinting {self.filename}")
-
-            from io import BytesIO
-
             from ttfautohint import ttfautohint
 
             opts = {"no-info": True, **conf}
@@ -571,87 +1924,114 @@ class Font:
             for key in {"disable", "in_buffer", "in_file", "out_file"}:
                 opts.pop(key, None)
 
-            buf = BytesIO()
-            otf.save(buf)
-            otf.close()
-            data = ttfautohint(in_buffer=buf.getvalue(), **opts)
-            otf = TTFont(BytesIO(data))
+            def autohint(data):
+                logger.info(f"Autohinting {self.filename}")
+                return ttfautohint(in_buffer=data, **opts)
 
-            # Set bit 3 on head.flags
-            # https://font-bakery.readthedocs.io/en/latest/fontbakery/profiles/googlefonts.html#com.google.fonts/check/integer_ppem_if_hinted
-            head = otf["head"]
-            head.flags |= 1 << 3
         elif self.fmt == Format.OTF:
             conf = self.autohinting.get("psautohint", {})
             if conf.get("disable"):
                 return otf
 
-            logger.info(f"Autohinting {self.filename}")
-
             from tempfile import TemporaryDirectory
 
             from psautohint.__main__ import main as psautohint
 
-            with TemporaryDirectory() as d:
-                path = Path(d) / "tmp.otf"
-                otf.save(path)
-                with TemporaryLogLevel(logging.ERROR):
-                    psautohint([str(path)])
-                otf.close()
-                otf = TTFont(path)
+            opts = {}
+
+            def autohint(data):
+                logger.info(f"Autohinting {self.filename}")
+                with TemporaryDirectory() as d:
+                    path = Path(d) / "tmp.otf"
+                    path.write_bytes(data)
+                    with TemporaryLogLevel(logging.ERROR):
+                        psautohint([str(path)])
+                    return path.read_bytes()
+
+        else:
+            return otf
+
+        buf = BytesIO()
+        otf.save(buf)
+        created = otf["head"].created
+        otf.close()
+        data = buf.getvalue()
+        digest = fontDigest(data, self.fmt.value, sorted(opts.items()))
+        otf = TTFont(BytesIO(self._cached("autohint", digest, lambda: autohint(data))))
+
+        # Cached fonts keep the timestamps of the build they were cached in.
+        head = otf["head"]
+        head.created = created
+        if self.fmt == Format.TTF:
+            # Set bit 3 on head.flags
+            # https://font-bakery.readthedocs.io/en/latest/fontbakery/profiles/googlefonts.html#com.google.fonts/check/integer_ppem_if_hinted
+            head.flags |= 1 << 3
         return otf
 
     def _subset(self, otf):
-        from fontTools.subset import Options, Subsetter
-
         for name, subset in self.subsets.items():
             with SaveState(self):
                 self.name = name
-                logger.info(f"Creating {self.filename} subset")
-                new = deepcopy(otf)
-                options = Options()
-                options.name_legacy = True
-                options.name_languages = ["*"]
-                options.recommended_glyphs = True
-                options.layout_features = ["*"]
-                options.notdef_outline = True
-                options.notdef_glyph = True
-                options.glyph_names = True
-                options.hinting = True
-                options.legacy_kern = True
-                options.symbol_cmap = True
-                options.layout_closure = False
-                options.prune_unicode_ranges = True
-                options.prune_codepage_ranges = True
-                options.passthrough_tables = False
-                options.recalc_average_width = True
-                options.ignore_missing_glyphs = True
-                options.layout_scripts = subset["langsys"]
-
-                options.drop_tables.remove("DSIG")
-                options.no_subset_tables += ["DSIG", "meta"]
-
-                options.name_IDs = [
-                    n.nameID for n in otf["name"].names if n.nameID < 256
-                ]
-
-                subsetter = Subsetter(options=options)
-                subsetter.populate(subset["glyphlist"])
-
-                with TemporaryLogLevel(logging.WARNING):
-                    subsetter.subset(new)
-
+                if self._resumed():
+                    continue
+                derivable = self._derivable(subset)
                 self.names = subset.get("names", {})
                 self.instances = subset.get("instances")
                 self.meta = subset.get("meta")
-                self._overridecmap(new, subset.get("cmapoverride"))
-                new = self._optimize(new)
-                self._setnames(new)
-                self._setmeta(new)
-                self._instanciate(new)
+                new = self._restore("subset")
+                subsetted = new is None
+                if new is None:
+                    with StageMemory(self, "subset", otf["maxp"].numGlyphs):
+                        new = self._subsetfont(otf, subset)
+                    self._checkpoint("subset", new)
+                self._tick("subset", len(new.getGlyphOrder()), ran=subsetted)
+                self._instanciate(new, subset, derivable)
                 self._addvfsuffix(new)
-                self._buildwoff(new)
-                self._save(new)
+                data = self._save(new)
+                self._buildwoff(data)
+                self._checkpoint("done")
+
+    def _subsetfont(self, otf, subset):
+        from fontTools.subset import Options, Subsetter
+
+        logger.info(f"Creating {self.filename} subset")
+        new = deepcopy(otf)
+        options = Options()
+        options.name_legacy = True
+        options.name_languages = ["*"]
+        options.recommended_glyphs = True
+        options.layout_features = ["*"]
+        options.notdef_outline = True
+        options.notdef_glyph = True
+        options.glyph_names = True
+        options.hinting = True
+        options.legacy_kern = True
+        options.symbol_cmap = True
+        options.layout_closure = False
+        options.prune_unicode_ranges = True
+        options.prune_codepage_ranges = True
+        options.passthrough_tables = False
+        options.recalc_average_width = True
+        options.ignore_missing_glyphs = True
+        options.layout_scripts = subset["langsys"]
+
+        options.drop_tables.remove("DSIG")
+        options.no_subset_tables += ["DSIG", "meta"]
+
+        options.name_IDs = [n.nameID for n in otf["name"].names if n.nameID < 256]
+
+        subsetter = Subsetter(options=options)
+        subsetter.populate(subset["glyphlist"])
+
+        with TemporaryLogLevel(logging.WARNING):
+            subsetter.subset(new)
+
+        self._overridecmap(new, subset.get("cmapoverride"))
+        new = self._optimize(new)
+        self._setnames(new)
+        self._setmeta(new)
+
+        return new
 
     def _removeoverlaps(self, otf):
         from fontTools.ttLib.removeOverlaps import removeOverlaps
@@ -663,22 +2043,53 @@ class Font:
             pass
         return otf
 
-    def _instanciate(self, vf):
-        if self.instances is None or not self.variable:
-            return
+    def _derivable(self, subset):
+        """Whether instances of the subset can be derived by subsetting the
+        finished instances of the full font. This is not the case when the
+        subset overrides names, or when TTF instances are autohinted, since
+        ttfautohint hints depend on the whole glyph set."""
+        if subset.get("names", {}) != self.names or subset.get("DSIG") != self.DSIG:
+            return False
+        if self.fmt == Format.TTF:
+            return bool(self.autohinting.get("ttfautohint", {}).get("disable"))
+        return True
+
+    def _instancekey(self, coordinates, conf):
+        names = conf.get("names", {})
+        return (
+            self.fmt,
+            tuple(sorted(coordinates.items())),
+            tuple(sorted(names.items())),
+        )
 
+    def _deriveinstance(self, static, subset):
         from io import BytesIO
 
         from fontTools.ttLib import TTFont
-        from fontTools.varLib.instancer import setRibbiBits
-        from fontTools.varLib.instancer.names import pruningUnusedNames, updateNameTable
-        from fontTools.varLib.mutator import instantiateVariableFont
 
-        logger.info(f"Instancing {self.filename} statics")
+        path, data, fontRevision = static
+        logger.info(f"Deriving {self.filename} from {path.name}")
+        otf = TTFont(BytesIO(data))
+
+        # Some odd rounding happens to fontRevision when loading from binary
+        # again, so reset it.
+        otf["head"].fontRevision = fontRevision
+
+        with StageMemory(self, "subset", otf["maxp"].numGlyphs):
+            otf = self._subsetfont(otf, subset)
+            data = self._save(otf, kind="instance")
+        self._buildwoff(data)
+        self._checkpoint("done")
+
+    def _instancelist(self, vf, subset=None):
+        """Returns the coordinates and configuration of each instance to
+        build from the variable font."""
         instances = []
         if not self.instances:
             for instance in vf["fvar"].instances:
-                name = instanceName(self.name, instance, vf)
+                # The fvar instance PostScript names are those of the full
+                # font, so name subset instances after the subset instead.
+                name = instanceName(self.name, instance, vf, subset is None)
                 conf = {"name": name.replace(" ", "")}
                 instances.append((instance.coordinates, conf))
         else:
@@ -692,49 +2103,141 @@ class Font:
                     if instanceMatch(key, instance, vf):
                         instances.append((instance.coordinates, conf))
                         break
+        return instances
 
-        for coordinates, conf in instances:
-            stream = BytesIO()
-            vf.save(stream)
-            stream.seek(0)
-            otf = TTFont(stream)
+    def _derivedkeys(self, vf):
+        """Returns how many subset instances will be derived from each static
+        instance of the full font, by instance key."""
+        from collections import Counter
 
-            # Some odd rounding happens to fontRevision when loading from
-            # binary again, so reset it.
-            otf["head"].fontRevision = vf["head"].fontRevision
+        keys = Counter()
+        if self.instances is None:
+            return keys
+        for name, subset in self.subsets.items():
+            if subset.get("instances") is None or not self._derivable(subset):
+                continue
+            with SaveState(self):
+                self.name = name
+                self.instances = subset["instances"]
+                for coordinates, conf in self._instancelist(vf, subset):
+                    coordinates = axisLimits(coordinates)
+                    if not isPartial(coordinates):
+                        keys[self._instancekey(coordinates, conf)] += 1
+        return keys
+
+    def _instanciate(self, vf, subset=None, derive=False):
+        """Builds static instances of the variable font. With `derive`, subset
+        instances matching finished instances of the full font are derived by
+        subsetting them instead."""
+        if self.instances is None or not self.variable:
+            return
 
-            # Remove Variations PS Name Prefix, and do so before updating the
-            # name table so it does not leak into the instance PS name.
-            otf["name"].removeNames(25)
+        from io import BytesIO
 
-            try:
-                updateNameTable(otf, coordinates)
-            except ValueError:
-                pass
+        from fontTools.ttLib import TTFont
+        from fontTools.varLib.instancer import setRibbiBits
+        from fontTools.varLib.instancer.names import pruningUnusedNames, updateNameTable
+        from fontTools.varLib.mutator import instantiateVariableFont
 
+        logger.info(f"Instancing {self.filename} statics")
+        vfdata = None
+        for coordinates, conf in self._instancelist(vf, subset):
+            coordinates = axisLimits(coordinates)
+            partial = isPartial(coordinates)
             with SaveState(self):
                 self.name = conf["name"]
-                logger.info(f"Instancing {self.filename}")
-                self.variable = False
-                self.STAT = None
-                with pruningUnusedNames(otf):
-                    if "CFF2" in otf:
-                        otf = instantiateCFF2(otf, coordinates)
-                    otf = instantiateVariableFont(otf, coordinates, inplace=True)
-                setRibbiBits(otf)
-                self.names = conf.get("names", {})
-                drop_typo_names = (1 in self.names and 2 in self.names) or False
-                otf = self._setnames(
-                    otf, fix_psname=True, drop_typo_names=drop_typo_names
-                )
-                otf = self._postprocess(otf)
-                otf = self._removeoverlaps(otf)
-                otf = self._autohint(otf)
-                otf = self._optimize(otf)
-                self._save(otf)
-                self._buildwoff(otf)
+                self.variable = partial
+                if self._resumed():
+                    continue
+
+                key = self._instancekey(coordinates, conf)
+                if derive and key in self._statics:
+                    static = self._statics[key]
+                    self._derived[key] -= 1
+                    if not self._derived[key]:
+                        del self._statics[key]
+                    self.STAT = None
+                    self.names = conf.get("names", {})
+                    self._deriveinstance(static, subset)
+                    continue
+
+            with StageMemory(self, "instance", len(vf.getGlyphOrder())):
+                # The variable font does not change while instancing, so compile
+                # it only once.
+                if vfdata is None:
+                    vfdata = self._compile(vf)
+                otf = TTFont(BytesIO(vfdata))
+
+                # Some odd rounding happens to fontRevision when loading from
+                # binary again, so reset it.
+                otf["head"].fontRevision = vf["head"].fontRevision
+
+                if partial:
+                    self._limitaxes(otf, coordinates, conf)
+                    continue
+
+                # Remove Variations PS Name Prefix, and do so before updating the
+                # name table so it does not leak into the instance PS name.
+                otf["name"].removeNames(25)
+
+                try:
+                    updateNameTable(otf, coordinates)
+                except ValueError:
+                    pass
+
+                with SaveState(self):
+                    self.name = conf["name"]
+                    logger.info(f"Instancing {self.filename}")
+                    self.variable = False
+                    self.STAT = None
+                    with pruningUnusedNames(otf):
+                        if "CFF2" in otf:
+                            otf = instantiateCFF2(otf, coordinates)
+                        elif "gvar" in otf and self.instancejobs > 1:
+                            otf = instantiateGvar(otf, coordinates, self.instancejobs)
+                        otf = instantiateVariableFont(otf, coordinates, inplace=True)
+                    setRibbiBits(otf)
+                    self.names = conf.get("names", {})
+                    drop_typo_names = (1 in self.names and 2 in self.names) or False
+                    otf = self._setnames(
+                        otf, fix_psname=True, drop_typo_names=drop_typo_names
+                    )
+                    otf = self._postprocess(otf)
+                    otf = self._removeoverlaps(otf)
+                    otf = self._autohint(otf)
+                    otf = self._optimize(otf)
+                    data = self._save(otf, kind="instance")
+                    self._buildwoff(data)
+                    self._checkpoint("done")
+                    if subset is None and self._derived.get(key):
+                        path = self._path()[1]
+                        self._statics[key] = (path, data, otf["head"].fontRevision)
+
+    def _limitaxes(self, otf, limits, conf):
+        """Builds a variable font with some axes limited to a narrower range
+        or pinned."""
+        from fontTools.varLib.instancer import instantiateVariableFont
+        from fontTools.varLib.instancer.names import updateNameTable
+
+        with SaveState(self):
+            self.name = conf["name"]
+            logger.info(f"Limiting {self.filename} axes")
+            try:
+                updateNameTable(otf, limits)
+            except ValueError:
+                pass
+            # This also limits the “STAT” table to the new axes ranges.
+            otf = instantiateVariableFont(otf, limits, inplace=True)
+            self.names = conf.get("names", {})
+            otf = self._setnames(otf)
+            otf = self._setdsig(otf)
+            self._addvfsuffix(otf)
+            data = self._save(otf, kind="instance")
+            self._buildwoff(data)
+            self._checkpoint("done")
 
     def _setnames(self, font, fix_psname=False, drop_typo_names=False):
+        self._touch(font, "name", "head", "CFF ")
         font["name"].names = [n for n in font["name"].names if n.platformID == 3]
         if not self.names and not fix_psname:
             return font
@@ -805,14 +2308,36 @@ class Font:
         from fontTools.cffLib.specializer import specializeProgram
 
         logger.info(f"Optimizing {self.filename}")
+        self._touch(otf, tag)
         topDict = otf[tag].cff.topDictIndex[0]
         charStrings = topDict.CharStrings
         for charString in charStrings.values():
             charString.decompile()
             charString.program = specializeProgram(charString.program)
 
-        logger.info(f"Subroutinizing {self.filename}")
-        cffsubr.subroutinize(otf, keep_glyph_names=False, cff_version=1)
+        if tag == "CFF ":
+            from io import BytesIO
+
+            from fontTools.ttLib import newTable
+
+            # Subroutinized tables are cached by the digest of the font, since
+            # tx reads more than the table, see _cached(). Both are loaded
+            # from their compiled data, like cffsubr does, so that fresh and
+            # cached ones are the same.
+            buf = BytesIO()
+            otf.save(buf)
+            data = buf.getvalue()
+
+            def subroutinize():
+                logger.info(f"Subroutinizing {self.filename}")
+                return cffsubr._tx_subroutinize(data)
+
+            digest = fontDigest(data, tag)
+            otf[tag] = newTable(tag)
+            otf[tag].decompile(self._cached("subr", digest, subroutinize), otf)
+        else:
+            logger.info(f"Subroutinizing {self.filename}")
+            cffsubr.subroutinize(otf, keep_glyph_names=False, cff_version=1)
 
         return otf
 
@@ -853,6 +2378,7 @@ class Font:
             return
 
         logger.info(f"Overriding “cmap” in {self.filename}")
+        self._touch(otf, "cmap")
         ga = otf.getGlyphOrder()
         cmap = otf["cmap"]
         for subtable in cmap.tables:
@@ -864,15 +2390,22 @@ class Font:
                         )
                     subtable.cmap[code] = glyphname
 
-    def _buildwoff(self, otf):
+    def _buildwoff(self, data):
+        """Builds the WOFF flavors of the font from its compiled data, so that
+        tables are not compiled again."""
+        from io import BytesIO
+
+        from fontTools.ttLib import TTFont
+
         for fmt in self.formats:
             if fmt not in (Format.WOFF, Format.WOFF2):
                 continue
-            new = deepcopy(otf)
-            new.flavor = fmt.value
-            self._save(new, fmt)
+            new = TTFont(BytesIO(data))
+            with StageMemory(self, "woff", new["maxp"].numGlyphs):
+                new.flavor = fmt.value
+                self._save(new, fmt)
 
-    def _save(self, otf, wfmt=None):
+    def _path(self, wfmt=None):
         import re
 
         fmt = self.fmt
@@ -881,143 +2414,314 @@ class Font:
             fmtdir += "VF"
         if wfmt is not None:
             fmtdir += wfmt.name
-            self.fmt = wfmt
+            fmt = wfmt
         name = re.sub(r"\[.*?\]", "", self.name).split("-")[0]
-        parent = self.output / name / fmtdir
-        parent.mkdir(parents=True, exist_ok=True)
-        path = parent / self.filename
-        logger.info(f"Saving {path}")
-        otf.save(path)
-        self.fmt = fmt
+        return fmtdir, self.output / name / fmtdir / f"{self.name}.{fmt.value}"
+
+    def _compile(self, otf):
+        """Compiles the font, and keeps the compiled data until the font is
+        saved, so that only the tables touched since are compiled again then,
+        see _touch() and _save()."""
+        from io import BytesIO
+
+        stream = BytesIO()
+        otf.save(stream)
+        data = stream.getvalue()
+        self._compiled[id(otf)] = (otf, data, set())
+        return data
+
+    def _touch(self, otf, *tags):
+        # Every change to a font after it was compiled must be recorded here,
+        # or the stale compiled table would be saved.
+        if id(otf) in self._compiled:
+            self._compiled[id(otf)][2].update(tags)
+
+    def _passthrough(self, otf):
+        """Returns the font loaded from its earlier compiled data, if any,
+        with the tables touched since taken from the font, so that the others
+        are saved as compiled bytes instead of being compiled again."""
+        from io import BytesIO
+
+        from fontTools.ttLib import TTFont
+
+        compiled = self._compiled.pop(id(otf), None)
+        if compiled is None:
+            return otf
+
+        _, data, touched = compiled
+        logger.info(f"Reusing compiled tables of {self.filename}")
+        new = TTFont(BytesIO(data))
+        # Bounding boxes were calculated when compiling, and none of the
+        # stages that touch a font afterwards changes outlines.
+        new.recalcBBoxes = False
+        for tag in touched:
+            if tag in otf:
+                new[tag] = otf[tag]
+            elif tag in new:
+                del new[tag]
+        return new
+
+    def _save(self, otf, wfmt=None, kind="save"):
+        from io import BytesIO
+
+        if self.stop is not None and self.stop.is_set():
+            raise RuntimeError(f"Building {self.name} was stopped")
+
+        otf = self._passthrough(otf)
+        _, path = self._path(wfmt)
+        stream = BytesIO()
+        otf.save(stream)
+        data = stream.getvalue()
+        if self.write:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            logger.info(f"Saving {path}")
+            with open(path, "wb") as f:
+                f.write(data)
+        if self.results is not None:
+            target = path.relative_to(self.output).as_posix()
+            self.results.put((target, data))
+        self._tick(kind, otf["maxp"].numGlyphs, path, wfmt, len(data))
+        return data
 
     def build(self):
+        import time
+
         logger.info(f"Building {self.name}")
+        self._clock = time.monotonic()
+        if self.checkpointing:
+            work = self.output / ".work" / self.name
+            self.checkpoint = Checkpoint(work, self._fingerprint(), self.resume)
         with SaveState(self):
             if self.variable:
                 self._buildvariable()
             else:
                 self._buildstatic()
+        if self.checkpoint:
+            self.checkpoint.clear()
 
     def _buildvariable(self):
         from fontTools.designspaceLib import DesignSpaceDocument
+
+        ds = DesignSpaceDocument.fromfile(self.source)
+
+        for fmt in self.formats:
+            self.fmt = fmt
+            if fmt not in (Format.TTF, Format.OTF):
+                continue
+            if self._resumed():
+                continue
+
+            compiled = False
+            vf = self._restore("postprocess")
+            if vf is None:
+                vf = self._restore("compile")
+                if vf is None:
+                    vf = self._compilevariable(ds)
+                    self._checkpoint("compile", vf)
+                    compiled = True
+                vf = self._setnames(vf)
+                vf = self._postprocess(vf)
+                self._setfeatureparams(vf)
+                self._checkpoint("postprocess", vf)
+
+            glyphs = len(vf.getGlyphOrder()) * len(ds.sources)
+            self._tick("compile", glyphs, ran=compiled)
+            self._compilememory(compiled)
+            # Instances first, so subset instances can be derived from them.
+            self._derived = self._derivedkeys(vf)
+            self._instanciate(vf)
+            self._subset(vf)
+            self._statics.clear()
+            self._addvfsuffix(vf)
+            vf = self._optimize(vf)
+            data = self._save(vf)
+            self._buildwoff(data)
+            self._checkpoint("done")
+
+    def _featureoptions(self, ufos):
+        from functools import partial
+
+        from ufo2ft.constants import MTI_FEATURES_PREFIX
+
+        options = {}
+        if {"GDEF", "GSUB", "GPOS"}.issubset(self.ttf.get("tables", {})):
+            options["featureWriters"] = []
+        if "source" in self.volt and {"GDEF", "GSUB", "GPOS"}.issubset(
+            self.volt.get("tables", ["GDEF", "GSUB", "GPOS"])
+        ):
+            options["featureWriters"] = []
+
+        # Features don’t depend on the outline format, so compile them once
+        # and share them between TTF and OTF builds. MTI features are left to
+        # ufo2ft.
+        if not any(
+            f.startswith(MTI_FEATURES_PREFIX) for u in ufos for f in u.data.fileNames
+        ):
+            options["featureCompilerClass"] = sharedFeatureCompiler(
+                self.cache.features, partial(self._countcache, "features")
+            )
+
+        return options
+
+    def _cu2qucache(self):
+        from functools import partial
+
+        path = self.output / ".cache" / "cu2qu" / f"{self.name}.json"
+        count = partial(self._countcache, "cu2qu")
+        return Cu2QuCache(path, self.cache.cu2qu, count)
+
+    def _compilevariable(self, ds):
         from fontTools.varLib import build as buildvf
         from ufo2ft import (
             compileInterpolatableOTFsFromDS,
             compileInterpolatableTTFsFromDS,
         )
 
-        ds = DesignSpaceDocument.fromfile(self.source)
-        ds.loadSourceFonts(lambda p: self._openufo(Path(p), self.source))
+        ds.loadSourceFonts(self._openufo)
 
         options = {"inplace": False}
-        if {"GDEF", "GSUB", "GPOS"}.issubset(self.ttf.get("tables", {})):
-            options["featureWriters"] = []
+        options.update(self._featureoptions([s.font for s in ds.sources]))
 
-        for fmt in self.formats:
-            self.fmt = fmt
-            if fmt == Format.TTF:
-                compileFont = compileInterpolatableTTFsFromDS
-            elif fmt == Format.OTF:
-                compileFont = compileInterpolatableOTFsFromDS
-            else:
-                continue
+        cu2qu = None
+        if self.fmt == Format.TTF:
+            compileFont = compileInterpolatableTTFsFromDS
+            cu2qu = self._cu2qucache()
+            options["preProcessorClass"] = cachedCu2QuPreProcessor(cu2qu, True)
+        else:
+            compileFont = compileInterpolatableOTFsFromDS
 
-            otfds = compileFont(ds, **options)
+        otfds = compileFont(ds, **options)
+        if cu2qu is not None and self.write:
+            cu2qu.save()
 
-            if "source" in self.ttf:
-                from fontTools.ttLib import TTFont
+        if "source" in self.ttf:
+            from fontTools.ttLib import TTFont
 
-                if len(otfds.sources) != len(self.ttf["source"]):
-                    raise RuntimeError("TTF sources must equal DesignSpace sources")
+            if len(otfds.sources) != len(self.ttf["source"]):
+                raise RuntimeError("TTF sources must equal DesignSpace sources")
 
-                for i, source in enumerate(otfds.sources):
-                    otl = TTFont(self.ttf["source"][i])
-                    with SaveState(self):
-                        self.name = Path(source.path).stem
-                        source.font = self._copytables(source.font, otl)
+            for i, source in enumerate(otfds.sources):
+                otl = TTFont(self.ttf["source"][i])
+                with SaveState(self):
+                    self.name = Path(source.path).stem
+                    source.font = self._copytables(source.font, otl)
 
-            vf, _, _ = buildvf(otfds)
+        if "source" in self.volt:
+            if len(otfds.sources) != len(self.volt["source"]):
+                raise RuntimeError("VOLT sources must equal DesignSpace sources")
 
-            vf = self._setnames(vf)
-            vf = self._postprocess(vf)
-            self._setfeatureparams(vf)
-            self._subset(vf)
-            self._instanciate(vf)
-            self._addvfsuffix(vf)
-            vf = self._optimize(vf)
-            self._buildwoff(vf)
-            self._save(vf)
+            for i, source in enumerate(otfds.sources):
+                with SaveState(self):
+                    self.name = Path(source.path).stem
+                    source.font = self._compilevolt(source.font, self.volt["source"][i])
 
-    def _buildstatic(self):
-        from ufo2ft import compileOTF, compileTTF
+        vf, _, _ = buildvf(otfds)
+        return vf
 
-        ufo = self._openufo(self.source)
+    def _buildstatic(self):
+        ufo = None
 
         for fmt in (Format.TTF, Format.OTF):
             self.fmt = fmt
-            options = {}
-            if fmt == Format.TTF:
-                compileFont = compileTTF
-            elif fmt == Format.OTF:
-                compileFont = compileOTF
-                options["optimizeCFF"] = False
-            else:
+            if self._resumed():
                 continue
 
-            options["removeOverlaps"] = True
-            options["overlapsBackend"] = "pathops"
-            if {"GDEF", "GSUB", "GPOS"}.issubset(self.ttf.get("tables", {})):
-                options["featureWriters"] = []
-
-            otf = compileFont(
-                ufo,
-                **options,
-            )
-
-            if (
-                fmt == Format.TTF
-                and "decompose" in self.components
-                and self.components["decompose"] == "overlapping"
-            ):
-                from fontTools.ttLib.removeOverlaps import removeTTGlyphOverlaps
-
-                # Decompose composite glyphs with overlapping components, and
-                # remove overelap. We already decomposed simple glyphs while
-                # building the font, so we process only composite glyphs below.
-                # The removeTTGlyphOverlaps function only decomposes composites
-                # with overlapping components, so we don’t check for the
-                # overlap ourselves.
-                logger.info(f"Decomposing {self.name} overlapping components")
-                glyf = otf["glyf"]
-                hmtx = otf["hmtx"]
-                glyphSet = otf.getGlyphSet()
-                glyphOrder = otf.getGlyphOrder()
-                for name in glyphOrder:
-                    glyph = glyf[name]
-                    if glyph.isComposite():
-                        removeTTGlyphOverlaps(name, glyphSet, glyf, hmtx, False)
-
-            if "source" in self.ttf:
-                from fontTools.ttLib import TTFont
-
-                otl = TTFont(self.ttf["source"])
-                otf = self._copytables(otf, otl)
+            otf = self._restore("postprocess")
+            compiled = otf is None
+            if otf is None:
+                if ufo is None:
+                    ufo = self._openufo(self.source)
+                otf = self._compilestatic(ufo)
+                otf = self._setnames(otf)
+                otf = self._postprocess(otf)
+                otf = self._autohint(otf)
+                self._setfeatureparams(otf)
+                self._checkpoint("postprocess", otf)
 
-            otf = self._setnames(otf)
-            otf = self._postprocess(otf)
-            otf = self._autohint(otf)
-            self._setfeatureparams(otf)
+            self._tick("compile", len(otf.getGlyphOrder()), ran=compiled)
+            self._compilememory(compiled)
             self._subset(otf)
             otf = self._optimize(otf)
-            self._buildwoff(otf)
-            self._save(otf)
+            data = self._save(otf)
+            self._buildwoff(data)
+            self._checkpoint("done")
+
+    def _compilestatic(self, ufo):
+        from ufo2ft import compileOTF, compileTTF
+
+        options = {}
+        cu2qu = None
+        if self.fmt == Format.TTF:
+            compileFont = compileTTF
+            cu2qu = self._cu2qucache()
+            options["preProcessorClass"] = cachedCu2QuPreProcessor(cu2qu, False)
+        else:
+            compileFont = compileOTF
+            options["optimizeCFF"] = False
+
+        options["removeOverlaps"] = True
+        options["overlapsBackend"] = "pathops"
+        options.update(self._featureoptions([ufo]))
+
+        otf = compileFont(
+            ufo,
+            **options,
+        )
+        if cu2qu is not None and self.write:
+            cu2qu.save()
+
+        if (
+            self.fmt == Format.TTF
+            and "decompose" in self.components
+            and self.components["decompose"] == "overlapping"
+        ):
+            from fontTools.ttLib.removeOverlaps import removeTTGlyphOverlaps
+
+            # Decompose composite glyphs with overlapping components, and
+            # remove overelap. We already decomposed simple glyphs while
+            # building the font, so we process only composite glyphs below.
+            # The removeTTGlyphOverlaps function only decomposes composites
+            # with overlapping components, so we don’t check for the
+            # overlap ourselves.
+            logger.info(f"Decomposing {self.name} overlapping components")
+            glyf = otf["glyf"]
+            hmtx = otf["hmtx"]
+            glyphSet = otf.getGlyphSet()
+            glyphOrder = otf.getGlyphOrder()
+            for name in glyphOrder:
+                glyph = glyf[name]
+                if glyph.isComposite():
+                    removeTTGlyphOverlaps(name, glyphSet, glyf, hmtx, False)
+
+        if "source" in self.ttf:
+            from fontTools.ttLib import TTFont
+
+            otl = TTFont(self.ttf["source"])
+            otf = self._copytables(otf, otl)
+
+        if "source" in self.volt:
+            otf = self._compilevolt(otf, self.volt["source"])
+
+        return otf
+
+
+def buildfont(font, progress, resume=False, checkpoint=False, instancejobs=1):
+    font.progress = progress
+    font.resume = resume
+    font.checkpointing = checkpoint
+    font.instancejobs = instancejobs
+    font.build()
+    return peakmemory(), font.cachestats, font.memorypeaks
 
 
 class Builder:
-    def __init__(self, path):
-        with open(path) as f:
-            project = yaml.safe_load(f)
-            project["path"] = path
+    def __init__(self, path, project=None):
+        if project is None:
+            with open(path) as f:
+                project = yaml.safe_load(f)
+        else:
+            project = deepcopy(project)
+        project["path"] = path
 
         if project.get("fonts", None) is None:
             raise RuntimeError("Missing or empty top level “fonts:” key.")
@@ -1029,9 +2733,608 @@ class Builder:
         if not self.fonts:
             raise RuntimeError("There are no fonts in the project.")
 
-    def build(self):
+        self.path = path
+        self.timings = BuildTimings(
+            path.parent / "output" / path.stem / ".timings.json"
+        )
+
+    def plan(self):
+        return {font.name: font.plan(self.timings) for font in self.fonts}
+
+    def preflight(self):
+        """Checks the configuration of all the fonts before building any, and
+        raises an error listing all the problems found."""
+        errors = []
+        for font in self.fonts:
+            errors += font.preflight()
+        if errors:
+            raise RuntimeError(
+                "Invalid configuration:\n" + "\n".join(f"  {e}" for e in errors)
+            )
+
+    def printplan(self, jobs=1):
+        plan = self.plan()
+        totals = {name: sum(s.cost for s in steps) for name, steps in plan.items()}
+
         for font in self.fonts:
-            font.build()
+            steps = plan[font.name]
+            memory = formatsize(font.memory(self.timings))
+            files = len([s for s in steps if s.path])
+            print(f"{font.name}: {files} files, {memory} peak memory")
+            for step in steps:
+                what = step.path or f"[{step.key}]"
+                print(f"  {formatduration(step.cost):>8}  {what}")
+
+        # Fonts are built in parallel, each serially in one process, so the
+        # critical path is the most expensive font.
+        critical = max(totals, key=totals.get)
+        workers = [0] * max(jobs, 1)
+        for total in sorted(totals.values(), reverse=True):
+            workers[workers.index(min(workers))] += total
+
+        files = len([s for steps in plan.values() for s in steps if s.path])
+        print(f"Total: {files} files, {formatduration(sum(totals.values()))}")
+        print(f"Critical path: {critical}, {formatduration(totals[critical])}")
+        print(f"Expected wall time with {jobs} job(s): {formatduration(max(workers))}")
+
+    def build(
+        self,
+        jobs=1,
+        resume=False,
+        checkpoint=False,
+        instancejobs=1,
+        budget=None,
+        metrics=None,
+    ):
+        buildprojects([self], jobs, resume, checkpoint, instancejobs, budget, metrics)
+
+
+def preflightprojects(builders):
+    """Checks the configuration of all the projects, before building any."""
+    errors = []
+    for builder in builders:
+        try:
+            builder.preflight()
+        except RuntimeError as e:
+            errors.append(f"{builder.path}: {e}" if len(builders) > 1 else str(e))
+    if errors:
+        raise RuntimeError("\n".join(errors))
+
+
+def buildprojects(
+    builders,
+    jobs=1,
+    resume=False,
+    checkpoint=False,
+    instancejobs=1,
+    budget=None,
+    metrics=None,
+):
+    """Builds the fonts of one or more projects, sharing the worker processes
+    and the caches. Build metrics are written to the metrics path, if
+    given."""
+    import time
+
+    preflightprojects(builders)
+
+    # A resumed build keeps checkpointing, in case it fails again.
+    checkpoint = checkpoint or resume
+
+    fonts = []
+    steps = {}
+    timings = {}
+    cache = BuildCache()
+    for builder in builders:
+        plan = builder.plan()
+        steps[builder.path] = [s for font in plan.values() for s in font]
+        timings[builder.path] = builder.timings
+        for font in builder.fonts:
+            font.estimates = {(s.key, s.name): s.cost for s in plan[font.name]}
+            font.cache = cache
+            fonts.append(font)
+
+    start = time.monotonic()
+    metrics = BuildMetrics(metrics) if metrics else None
+    progress = BuildProgress([s for p in steps.values() for s in p], timings, metrics)
+    if jobs > 1 and len(fonts) > 1:
+        from concurrent.futures import (
+            FIRST_COMPLETED,
+            ProcessPoolExecutor,
+            wait,
+        )
+        from multiprocessing import Manager
+        from tempfile import TemporaryDirectory
+        from threading import Thread
+
+        memory = {f: f.memory(timings[f.project]) for f in fonts}
+        for font in fonts:
+            rates = timings[font.project]
+            kinds = BuildTimings.STAGE_MEMORY
+            font.memoryrates = {k: rates.stagememory(k) for k in kinds}
+        if budget:
+            for font, peak in memory.items():
+                if peak > budget:
+                    logger.warning(
+                        f"{font.name} is expected to need {formatsize(peak)}, "
+                        f"more than the memory budget of {formatsize(budget)}"
+                    )
+
+        with Manager() as manager, TemporaryDirectory(prefix="tirobuild-") as temp:
+            # Each worker gets its own copy of the caches, so share them
+            # through a temporary folder.
+            cache.share(Path(temp))
+            queue = manager.Queue()
+            limit = MemoryBudget(manager, budget) if budget else None
+            thread = Thread(target=progress.drain, args=(queue,))
+            thread.start()
+            try:
+                # Each font is built in a fresh process, so that its peak
+                # memory can be measured.
+                with ProcessPoolExecutor(jobs, max_tasks_per_child=1) as executor:
+                    pending = list(fonts)
+                    running = {}
+                    while pending or running:
+                        # Start the fonts whose compilation fits in the
+                        # remaining memory budget, in order, letting smaller
+                        # fonts fill in for bigger ones that don’t fit yet. A
+                        # font that doesn’t fit on its own is built alone. The
+                        # later stages of running fonts reserve their memory
+                        # from the same budget, see MemoryBudget.
+                        for font in list(pending):
+                            if len(running) >= jobs:
+                                break
+                            if limit is not None:
+                                if not limit.admit(memory[font], running):
+                                    continue
+                                font.budget = limit
+                            future = executor.submit(
+                                buildfont,
+                                font,
+                                queue,
+                                resume,
+                                checkpoint,
+                                instancejobs,
+                            )
+                            running[future] = font
+                            pending.remove(font)
+
+                        # Stages releasing memory might let more fonts in, so
+                        # check again after a while.
+                        done, _ = wait(running, 1, FIRST_COMPLETED)
+                        for future in done:
+                            font = running.pop(future)
+                            if limit is not None:
+                                limit.release(memory[font], stage=False)
+                            peak, caches, peaks = future.result()
+                            rates = timings[font.project]
+                            for kind, value in peaks.items():
+                                if kind == "compile":
+                                    rates.recordmemory(font.name, value)
+                                else:
+                                    rates.recordstagememory(kind, value)
+                            if metrics is not None:
+                                metrics.recordfont(font, peak, caches)
+            finally:
+                queue.put(None)
+                thread.join()
+    else:
+        for font in fonts:
+            # Fonts built in one process share its peak memory, which says
+            # nothing about each font, so it is not recorded.
+            _, caches, _ = buildfont(font, progress, resume, checkpoint, instancejobs)
+            if metrics is not None:
+                metrics.recordfont(font, None, caches)
+
+    for builder in builders:
+        builder.timings.save()
+    if metrics is not None:
+        metrics.save(time.monotonic() - start)
+
+    if len(builders) > 1:
+        elapsed = formatduration(time.monotonic() - start)
+        logger.info(f"Built {len(builders)} projects in {elapsed}:")
+        for builder in builders:
+            paths = {s.path for s in steps[builder.path] if s.path}
+            paths = [p for p in paths if p.exists()]
+            size = formatsize(sum(p.stat().st_size for p in paths))
+            logger.info(f"  {builder.path}: {len(paths)} files, {size}")
+
+
+def buildproject(project, path, write=False):
+    """Builds the fonts of a project configuration dictionary, yielding the
+    (target, data) of each output as soon as it is finished, where target is
+    the output path relative to the project output folder. Relative paths in
+    the configuration are resolved against the folder of the project file
+    path, which does not need to exist. Outputs are only written to disk
+    with `write`, and no checkpoints or timings are saved."""
+    from queue import SimpleQueue
+    from threading import Event, Thread
+
+    builder = Builder(Path(path), project)
+    builder.preflight()
+    results = SimpleQueue()
+    stop = Event()
+
+    def build():
+        try:
+            for font in builder.fonts:
+                if stop.is_set():
+                    break
+                font.write = write
+                font.results = results
+                font.stop = stop
+                buildfont(font, None, checkpoint=False)
+        except BaseException as e:
+            results.put(e)
+        else:
+            results.put(None)
+
+    thread = Thread(target=build, daemon=True)
+    thread.start()
+    try:
+        while (result := results.get()) is not None:
+            if isinstance(result, BaseException):
+                raise result
+            yield result
+    finally:
+        # Stop building if the caller stops iterating early.
+        stop.set()
+        thread.join()
+
+
+class LookupProfiler:
+    """Attributes the cost of shaping a text corpus to individual GSUB/GPOS
+    lookups and subtables.
+
+    Each lookup is masked in turn (its subtables are emptied, so nested
+    lookup calls are masked too) and the slow down of shaping without it is
+    taken as its cost. Only the masked layout table is recompiled, the rest
+    of the font tables are compiled once and shared between all the faces."""
+
+    def __init__(self, otf, corpus, repeat=5, features=None):
+        self.otf = otf
+        self.corpus = [line for line in corpus if line.strip()]
+        self.repeat = repeat
+        self.features = features
+        self.tables = {}
+
+    def _face(self, overrides=None):
+        import uharfbuzz as hb
+
+        overrides = overrides or {}
+
+        def reference(face, tag, data):
+            if tag in overrides:
+                return overrides[tag]
+            if tag not in self.tables:
+                self.tables[tag] = (
+                    self.otf.getTableData(tag) if tag in self.otf else b""
+                )
+            return self.tables[tag]
+
+        return hb.Face.create_for_tables(reference, None)
+
+    def _time(self, face):
+        import time
+
+        import uharfbuzz as hb
+
+        font = hb.Font(face)
+
+        def shape():
+            for line in self.corpus:
+                buf = hb.Buffer()
+                buf.add_str(line)
+                buf.guess_segment_properties()
+                hb.shape(font, buf, self.features)
+
+        # Warm up the shape plans and table accelerators.
+        shape()
+
+        best = None
+        for _ in range(self.repeat):
+            start = time.perf_counter()
+            shape()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    def _masked(self, tag, masks):
+        table = self.otf[tag].table
+        saved = {}
+        for index, subtable in masks:
+            lookup = table.LookupList.Lookup[index]
+            if index not in saved:
+                saved[index] = lookup.SubTable
+                lookup.SubTable = list(lookup.SubTable)
+            if subtable is None:
+                lookup.SubTable = []
+            else:
+                lookup.SubTable[subtable] = None
+        for lookup in (table.LookupList.Lookup[i] for i in saved):
+            lookup.SubTable = [s for s in lookup.SubTable if s is not None]
+            lookup.SubTableCount = len(lookup.SubTable)
+        try:
+            return self._time(self._face({tag: self.otf[tag].compile(self.otf)}))
+        finally:
+            for index, subtables in saved.items():
+                lookup = table.LookupList.Lookup[index]
+                lookup.SubTable = subtables
+                lookup.SubTableCount = len(subtables)
+
+    def _cost(self, total, tag, masks):
+        # Timings are noisy, and masking a cheap lookup can come out faster
+        # than the total, so costs below it are taken as zero.
+        return max(0, total - self._masked(tag, masks))
+
+    def profile(self, subtables=False):
+        """Returns the total shaping time and a list of (cost, tag, lookup
+        index, subtable index, lookup type) tuples, most expensive first."""
+        total = self._time(self._face())
+
+        results = []
+        for tag in ("GSUB", "GPOS"):
+            if tag not in self.otf or not self.otf[tag].table.LookupList:
+                continue
+            lookups = self.otf[tag].table.LookupList.Lookup
+            logger.info(f"Profiling {len(lookups)} “{tag}” lookups")
+            for i, lookup in enumerate(lookups):
+                kind = lookup.LookupType
+                if lookup.SubTable and hasattr(lookup.SubTable[0], "ExtSubTable"):
+                    kind = lookup.SubTable[0].ExtSubTable.LookupType
+                cost = self._cost(total, tag, [(i, None)])
+                results.append((cost, tag, i, None, kind))
+                if not subtables or len(lookup.SubTable) < 2:
+                    continue
+                for j in range(len(lookup.SubTable)):
+                    cost = self._cost(total, tag, [(i, j)])
+                    results.append((cost, tag, i, j, kind))
+
+        return total, sorted(results, key=lambda r: r[0], reverse=True)
+
+
+def profilefonts(paths):
+    """Expands project files to the TTF/OTF fonts they build and the OTL
+    sources they copy tables from."""
+    fonts = []
+    for path in paths:
+        if path.suffix not in (".yml", ".yaml"):
+            fonts.append(path)
+            continue
+        for font in Builder(path).fonts:
+            for fmt in (Format.TTF, Format.OTF):
+                fonts += sorted(font.output.glob(f"**/{fmt.name}*/*.{fmt.value}"))
+            source = font.ttf.get("source", [])
+            fonts += source if isinstance(source, list) else [source]
+    return fonts
+
+
+def profile(args=None):
+    from argparse import ArgumentParser
+
+    from fontTools.ttLib import TTFont
+
+    parser = ArgumentParser(
+        prog="tirobuild profile",
+        description="Profile the shaping cost of GSUB/GPOS lookups.",
+    )
+    parser.add_argument(
+        "inputs",
+        metavar="INPUT",
+        nargs="+",
+        type=Path,
+        help="Font files, or project files to profile their output fonts "
+        "and OTL sources.",
+    )
+    parser.add_argument(
+        "-t", "--text", required=True, type=Path, help="Text corpus file."
+    )
+    parser.add_argument(
+        "-r", "--repeat", type=int, default=5, help="Timing repetitions."
+    )
+    parser.add_argument(
+        "-n", "--top", type=int, default=20, help="Number of lookups to report."
+    )
+    parser.add_argument(
+        "-s", "--subtables", action="store_true", help="Profile subtables too."
+    )
+    parser.add_argument(
+        "-f",
+        "--features",
+        default="",
+        help="Comma-separated features to enable, or disable with “-” prefix.",
+    )
+    options = parser.parse_args(args)
+
+    features = {}
+    for tag in options.features.split(","):
+        if tag := tag.strip():
+            features[tag.lstrip("-+")] = not tag.startswith("-")
+
+    with open(options.text) as f:
+        corpus = f.read().split("\n")
+
+    for path in profilefonts(options.inputs):
+        logger.info(f"Profiling {path}")
+        profiler = LookupProfiler(TTFont(path), corpus, options.repeat, features)
+        total, results = profiler.profile(options.subtables)
+        print(f"{path}: {total * 1000:.2f} ms")
+        for cost, tag, lookup, subtable, kind in results[: options.top]:
+            where = f"{tag} lookup {lookup}"
+            if subtable is not None:
+                where += f" subtable {subtable}"
+            share = cost / total * 100 if total else 0
+            print(f"  {cost * 1000:8.3f} ms {share:6.1f}%  {where} (type {kind})")
+
+
+FONT_SUFFIXES = (".ttf", ".otf", ".woff", ".woff2")
+
+
+def namerecords(table):
+    return {
+        (n.nameID, n.platformID, n.platEncID, n.langID): n.toUnicode()
+        for n in table.names
+    }
+
+
+def cmaprecords(table):
+    records = {}
+    for subtable in table.tables:
+        key = (subtable.platformID, subtable.platEncID, subtable.format)
+        if subtable.format == 14:
+            for selector, mappings in subtable.uvsDict.items():
+                for codepoint, glyph in mappings:
+                    records[key + (f"U+{codepoint:04X} U+{selector:04X}",)] = glyph
+        else:
+            for codepoint, glyph in subtable.cmap.items():
+                records[key + (f"U+{codepoint:04X}",)] = glyph
+    return records
+
+
+def statrecords(table):
+    table = table.table
+    axes = table.DesignAxisRecord.Axis if table.DesignAxisRecord else []
+    records = {("ElidedFallbackNameID",): table.ElidedFallbackNameID}
+    for axis in axes:
+        records[("axis", axis.AxisTag)] = (axis.AxisNameID, axis.AxisOrdering)
+
+    values = table.AxisValueArray.AxisValue if table.AxisValueArray else []
+    for value in values:
+        if value.Format == 4:
+            location = tuple(
+                (axes[r.AxisIndex].AxisTag, r.Value) for r in value.AxisValueRecord
+            )
+        else:
+            location = ((axes[value.AxisIndex].AxisTag, value.Value),)
+        fields = {
+            k: v
+            for k, v in vars(value).items()
+            if k not in ("Format", "AxisIndex", "AxisCount", "AxisValueRecord")
+        }
+        records[("value", value.Format, location)] = fields
+    return records
+
+
+def diffrecords(old, new, limit=20):
+    """Returns the lines of a keyed diff between two dictionaries of table
+    records, listing at most limit differences."""
+    lines = []
+    for key in sorted(old.keys() | new.keys(), key=repr):
+        if key not in new:
+            lines.append(f"- {key}: {old[key]!r}")
+        elif key not in old:
+            lines.append(f"+ {key}: {new[key]!r}")
+        elif old[key] != new[key]:
+            lines.append(f"  {key}: {old[key]!r} → {new[key]!r}")
+    if len(lines) > limit:
+        lines = lines[:limit] + [f"… and {len(lines) - limit} more"]
+    return lines
+
+
+TABLE_RECORDS = {
+    "name": namerecords,
+    "cmap": cmaprecords,
+    "STAT": statrecords,
+}
+
+
+def comparefonts(old, new):
+    """Compares two font files table by table, ignoring the timestamps and
+    checksum adjustment in the “head” table. Returns the tags of the tables
+    that differ, and the diffs of the records of those in TABLE_RECORDS."""
+    from fontTools.ttLib import TTFont
+
+    if old.read_bytes() == new.read_bytes():
+        return [], {}
+
+    fonts = [TTFont(p, lazy=True, recalcTimestamp=False) for p in (old, new)]
+    for font in fonts:
+        if "head" in font:
+            head = font["head"]
+            head.created = head.modified = head.checkSumAdjustment = 0
+
+    tags = sorted((set(fonts[0].keys()) | set(fonts[1].keys())) - {"GlyphOrder"})
+    differ = []
+    diffs = {}
+    for tag in tags:
+        if tag not in fonts[0] or tag not in fonts[1]:
+            differ.append(tag)
+            continue
+        if fonts[0].getTableData(tag) == fonts[1].getTableData(tag):
+            continue
+        differ.append(tag)
+        if tag in TABLE_RECORDS:
+            records = [TABLE_RECORDS[tag](font[tag]) for font in fonts]
+            diffs[tag] = diffrecords(*records)
+    return differ, diffs
+
+
+def fontfiles(path):
+    """Returns the font files in an output folder, relative to it, skipping
+    the hidden cache and checkpoint folders."""
+    files = set()
+    for suffix in FONT_SUFFIXES:
+        for file in path.rglob(f"*{suffix}"):
+            relative = file.relative_to(path)
+            if not any(part.startswith(".") for part in relative.parts):
+                files.add(relative)
+    return files
+
+
+def compare(args=None):
+    import os
+    from argparse import ArgumentParser
+    from concurrent.futures import ProcessPoolExecutor
+
+    parser = ArgumentParser(
+        prog="tirobuild compare",
+        description="Compare the fonts of two builds table by table.",
+    )
+    parser.add_argument(
+        "old", type=Path, help="Output folder of the first build, or a font file."
+    )
+    parser.add_argument(
+        "new", type=Path, help="Output folder of the second build, or a font file."
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=os.cpu_count(),
+        help="Number of fonts to compare in parallel",
+    )
+    options = parser.parse_args(args)
+
+    if options.old.is_file() and options.new.is_file():
+        pairs = {Path(options.new.name): (options.old, options.new)}
+        missing = []
+    else:
+        old, new = fontfiles(options.old), fontfiles(options.new)
+        missing = [f"- {p}" for p in sorted(old - new)]
+        missing += [f"+ {p}" for p in sorted(new - old)]
+        pairs = {p: (options.old / p, options.new / p) for p in sorted(old & new)}
+
+    for line in missing:
+        print(line)
+
+    different = 0
+    with ProcessPoolExecutor(max(options.jobs, 1)) as executor:
+        results = executor.map(comparefonts, *zip(*pairs.values()))
+        for path, (tags, diffs) in zip(pairs, results):
+            if not tags:
+                continue
+            different += 1
+            print(f"{path}: {', '.join(tags)}")
+            for tag, lines in diffs.items():
+                print(f"  {tag}:")
+                for line in lines:
+                    print(f"    {line}")
+
+    print(
+        f"{len(pairs)} fonts compared, {different} differ, "
+        f"{len(missing)} only in one build"
+    )
+    return 1 if different or missing else 0
 
 
 class ColorLogFormatter(logging.Formatter):
@@ -1051,24 +3354,103 @@ class ColorLogFormatter(logging.Formatter):
         return logging.Formatter(fmt).format(record)
 
 
-def main(args=None):
-    from argparse import ArgumentParser
-
-    parser = ArgumentParser(description="Build Tiro fonts.")
-    parser.add_argument("project", metavar="PROJECT", help="Project file.", type=Path)
-    parser.add_argument("-q", "--quite", action="store_true", help="Be quite")
-    options = parser.parse_args(args)
-
+def setuplogging(quite=False):
     ch = logging.StreamHandler()
     ch.setLevel(logging.DEBUG)
     ch.setFormatter(ColorLogFormatter())
-    if options.quite:
+    if quite:
         logging.basicConfig(level=logging.WARNING, handlers=[ch])
     else:
         logging.basicConfig(level=logging.INFO, handlers=[ch])
 
-    builder = Builder(options.project)
-    builder.build()
+
+COMMANDS = {
+    "profile": profile,
+    "compare": compare,
+}
+
+
+def main(args=None):
+    import sys
+    from argparse import ArgumentParser
+
+    if args is None:
+        args = sys.argv[1:]
+    if args and args[0] in COMMANDS:
+        setuplogging()
+        return COMMANDS[args[0]](args[1:])
+
+    parser = ArgumentParser(description="Build Tiro fonts.")
+    parser.add_argument(
+        "projects",
+        metavar="PROJECT",
+        nargs="+",
+        help="Project file(s), built together in one run.",
+        type=Path,
+    )
+    parser.add_argument("-q", "--quite", action="store_true", help="Be quite")
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=1, help="Number of fonts to build in parallel"
+    )
+    parser.add_argument(
+        "--plan",
+        action="store_true",
+        help="Print the build outputs and estimated costs without building",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        action="store_true",
+        help="Save intermediate build artifacts, so a failed build can be resumed",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Resume a failed build from its last checkpoint",
+    )
+    parser.add_argument(
+        "--instance-jobs",
+        type=int,
+        default=1,
+        help="Number of processes to instantiate TrueType glyphs of each instance in",
+    )
+    parser.add_argument(
+        "--memory-budget",
+        type=parsesize,
+        help="Only build fonts in parallel while their expected peak memory "
+        "fits in this size, e.g. “12G”",
+    )
+    parser.add_argument(
+        "--metrics",
+        type=Path,
+        help="Write build metrics in OpenMetrics text format to this file",
+    )
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Check the configuration against the sources without building",
+    )
+    options = parser.parse_args(args)
+
+    setuplogging(options.quite)
+
+    builders = [Builder(path) for path in options.projects]
+    if options.check:
+        preflightprojects(builders)
+        logger.info("Configuration is valid")
+        return
+    if options.plan:
+        for builder in builders:
+            builder.printplan(options.jobs)
+        return
+    buildprojects(
+        builders,
+        options.jobs,
+        options.resume,
+        options.checkpoint,
+        options.instance_jobs,
+        options.memory_budget,
+        options.metrics,
+    )
 
 
 if __name__ == "__main__":
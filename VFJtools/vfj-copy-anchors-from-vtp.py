@@ -73,6 +73,11 @@ def main(args=None):
         default=None,
         help="VFJ font layer name to copy anchors to, default: first layer",
     )
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="write compact JSON without indentation",
+    )
 
     options = parser.parse_args(args)
 
@@ -89,7 +94,7 @@ def main(args=None):
     except TTLibError:
         vtp = Parser(options.vtp).parse()
 
-    vfj = Font(options.vfj)
+    vfj = Font(options.vfj, lazy=True)
 
     layer = options.layer
     if layer is None:
@@ -102,7 +107,7 @@ def main(args=None):
 
     copyAnchors(vtp, vfj, layer)
 
-    vfj.save(options.output)
+    vfj.save(options.output, options.compact)
 
 
 if __name__ == "__main__":
@@ -12,11 +12,16 @@ def main(args=None):
     )
     parser.add_argument("input", type=Path, help="input VFJ file")
     parser.add_argument("output", type=Path, help="output VFJ file")
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="write compact JSON without indentation",
+    )
 
     options = parser.parse_args(args)
     font = Font(options.input)
     font.propagateAnchors()
-    font.save(options.output)
+    font.save(options.output, options.compact)
 
 
 if __name__ == "__main__":
@@ -78,6 +78,11 @@ def main(args=None):
         required=True,
         help="CSV file with new anchor positions",
     )
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="write compact JSON without indentation",
+    )
 
     options = parser.parse_args(args)
 
@@ -118,7 +123,7 @@ def main(args=None):
     if not process(font, positions):
         return 2
 
-    font.save(options.output)
+    font.save(options.output, options.compact)
 
 
 if __name__ == "__main__":
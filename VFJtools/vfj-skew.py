@@ -13,6 +13,15 @@ log = logging.getLogger()
 
 
 def process(font, transform):
+    try:
+        store = font.anchorStore()
+    except ImportError:
+        store = None
+    if store is not None:
+        store.transform(transform, round=True)
+        return
+
+    # NumPy is not available, transform the anchors one by one.
     for glyph in font:
         for layer in glyph.layers:
             for anchor in layer.anchors:
@@ -48,17 +57,22 @@ def main(args=None):
         default=0,
         help="the Y offset (default: 0)",
     )
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="write compact JSON without indentation",
+    )
 
     options = parser.parse_args(args)
 
-    font = Font(options.input)
+    font = Font(options.input, lazy=True)
 
     transform = Identity.skew(options.angle * math.pi / 180)
     if options.x_offset or options.y_offset:
         transform = transform.translate(options.x_offset, options.y_offset)
     process(font, transform)
 
-    font.save(options.output)
+    font.save(options.output, options.compact)
 
 
 if __name__ == "__main__":
@@ -27,26 +27,28 @@ def _attachment_lookup(name, mark_glyph_set=None):
 
 def exportVoltAnchors(font):
     glyphOrder = [g.name for g in font]
+    glyphIds = {name: gid for gid, name in reversed(list(enumerate(glyphOrder)))}
 
     # Save groups and lookups files for each master.
     for master in font.masters:
-        # Collect anchors that need mkmk lookups (base glyph is a mark).
+        # Split anchors into mark and base anchors, and collect the anchors
+        # that need mkmk lookups (base glyph is a mark) and ligature lookups
+        # (anchor with index), in one pass.
+        marks = []
+        bases = []
         mkmk = set()
-        for glyph in font:
-            layer = glyph.layers[master.name]
-            for anchor in layer.anchors:
-                name = anchor.name
-                if not name.startswith("_") and glyph.openTypeGlyphClass == 3:
-                    mkmk.add(name.split("_")[0])
-
-        # Collect anchors that need ligature lookups (anchor with index).
         ligs = set()
         for glyph in font:
             layer = glyph.layers[master.name]
             for anchor in layer.anchors:
                 name = anchor.name
                 if name.startswith("_"):
+                    marks.append((glyph, anchor))
                     name = name[1:]
+                else:
+                    bases.append((glyph, anchor))
+                    if glyph.openTypeGlyphClass == 3:
+                        mkmk.add(name.split("_")[0])
                 if "_" in name:
                     ligs.add(name.split("_")[0])
 
@@ -55,87 +57,80 @@ def exportVoltAnchors(font):
         anchors = []
 
         # Process mark anchors.
-        for glyph in font:
-            layer = glyph.layers[master.name]
-            for anchor in layer.anchors:
-                if anchor.name.startswith("_"):
-                    x = otRound(anchor.x)
-                    y = otRound(anchor.y)
-                    if glyph.openTypeGlyphClass != 3:
-                        # Not a mark glyph? Ignore the anchor or VOLT will error.
-                        continue
-
-                    name = anchor.name[1:]
-
-                    # Add to groups. We build groups for mark glyphs by anchor.
-                    group = f"MARK_{name}"
-                    if group not in groups:
-                        groups[group] = set()
-                    groups[group].add(glyph.name)
-
-                    # mkmk anchors are added to both mark and mkmk lookups
-                    # because they might be used with non-mark bases after
-                    # anchor propagation.
-                    lookup_names = [f"mark_{name}"]
-                    if name in mkmk:
-                        lookup_names.append(f"mkmk_{name}")
-                    if name in ligs:
-                        lookup_names.append(f"mark_{name}_ligs")
-
-                    # Add the glyph to respective lookup(s).
-                    for lookup_name in lookup_names:
-                        if lookup_name not in lookups:
-                            lookups[lookup_name] = _attachment_lookup(
-                                lookup_name,
-                                group if name not in mkmk else None,
-                            )
-
-                        # For mkmk lookups we use individual glyphs, for mark
-                        # lookups we use groups. There is no technical reason
-                        # for this, just how JH likes it.
-                        if lookup_name.startswith("mkmk"):
-                            to = ([ast.GlyphName(glyph.name)], name)
-                            lookups[lookup_name].pos.coverage_to.append(to)
-                        elif not lookups[lookup_name].pos.coverage_to:
-                            to = ([ast.GroupName(group, None)], name)
-                            lookups[lookup_name].pos.coverage_to.append(to)
-
-                    # Add the anchor.
-                    name, comp = f"MARK_{name}", 1
-                    pos = ast.Pos(None, x, y, {}, {}, {})
-                    gid = glyphOrder.index(glyph.name)
-                    anchors.append(
-                        ast.AnchorDefinition(name, gid, glyph.name, comp, False, pos)
-                    )
-
-        # Process base anchors
-        for glyph in font:
-            layer = glyph.layers[master.name]
-            for anchor in layer.anchors:
-                if not anchor.name.startswith("_"):
-                    x = otRound(anchor.x)
-                    y = otRound(anchor.y)
-                    name, comp = anchor.name, 1
-                    lookup_name = f"mark_{name}"
-                    if "_" in name:
-                        # Split ligature anchor (e.g. “top_1” and use the
-                        # number for ligature component.
-                        name, comp = name.split("_")
-                        lookup_name = f"mark_{name}_ligs"
+        for glyph, anchor in marks:
+            x = otRound(anchor.x)
+            y = otRound(anchor.y)
+            if glyph.openTypeGlyphClass != 3:
+                # Not a mark glyph? Ignore the anchor or VOLT will error.
+                continue
 
-                    if glyph.openTypeGlyphClass == 3:
-                        # If this is a mark glyph, then add to mkmk lookup.
-                        lookup_name = f"mkmk_{name}"
+            name = anchor.name[1:]
+
+            # Add to groups. We build groups for mark glyphs by anchor.
+            group = f"MARK_{name}"
+            if group not in groups:
+                groups[group] = set()
+            groups[group].add(glyph.name)
+
+            # mkmk anchors are added to both mark and mkmk lookups because
+            # they might be used with non-mark bases after anchor propagation.
+            lookup_names = [f"mark_{name}"]
+            if name in mkmk:
+                lookup_names.append(f"mkmk_{name}")
+            if name in ligs:
+                lookup_names.append(f"mark_{name}_ligs")
+
+            # Add the glyph to respective lookup(s).
+            for lookup_name in lookup_names:
+                if lookup_name not in lookups:
+                    lookups[lookup_name] = _attachment_lookup(
+                        lookup_name,
+                        group if name not in mkmk else None,
+                    )
 
-                    # Add the glyph to respective lookup.
-                    lookups[lookup_name].pos.coverage.add(glyph.name)
+                # For mkmk lookups we use individual glyphs, for mark lookups
+                # we use groups. There is no technical reason for this, just
+                # how JH likes it.
+                if lookup_name.startswith("mkmk"):
+                    to = ([ast.GlyphName(glyph.name)], name)
+                    lookups[lookup_name].pos.coverage_to.append(to)
+                elif not lookups[lookup_name].pos.coverage_to:
+                    to = ([ast.GroupName(group, None)], name)
+                    lookups[lookup_name].pos.coverage_to.append(to)
+
+            # Add the anchor.
+            name, comp = f"MARK_{name}", 1
+            pos = ast.Pos(None, x, y, {}, {}, {})
+            gid = glyphIds[glyph.name]
+            anchors.append(
+                ast.AnchorDefinition(name, gid, glyph.name, comp, False, pos)
+            )
 
-                    # Add the anchor.
-                    pos = ast.Pos(None, x, y, {}, {}, {})
-                    gid = glyphOrder.index(glyph.name)
-                    anchors.append(
-                        ast.AnchorDefinition(name, gid, glyph.name, comp, False, pos)
-                    )
+        # Process base anchors
+        for glyph, anchor in bases:
+            x = otRound(anchor.x)
+            y = otRound(anchor.y)
+            name, comp = anchor.name, 1
+            lookup_name = f"mark_{name}"
+            if "_" in name:
+                # Split ligature anchor (e.g. “top_1” and use the number for
+                # ligature component.
+                name, comp = name.split("_")
+                lookup_name = f"mark_{name}_ligs"
+
+            if glyph.openTypeGlyphClass == 3:
+                # If this is a mark glyph, then add to mkmk lookup.
+                lookup_name = f"mkmk_{name}"
+
+            # Add the glyph to respective lookup.
+            lookups[lookup_name].pos.coverage.add(glyph.name)
+
+            # Add the anchor.
+            pos = ast.Pos(None, x, y, {}, {}, {})
+            gid = glyphIds[glyph.name]
+            anchors.append(
+                ast.AnchorDefinition(name, gid, glyph.name, comp, False, pos)
+            )
 
         # Save groups file.
         with open(master.psn + "-anchors.vtg", "w") as fp:
@@ -154,7 +149,7 @@ def exportVoltAnchors(font):
                 # Sort coverage by glyph ID to be stable.
                 lookup.pos.coverage = sorted(
                     [ast.GlyphName(g) for g in lookup.pos.coverage],
-                    key=lambda g: glyphOrder.index(g.glyph),
+                    key=lambda g: glyphIds[g.glyph],
                 )
                 doc.statements.append(lookup)
             doc.statements += anchors
@@ -219,6 +214,9 @@ def _start_pair_lookup(lookups, kind="PPF1"):
         ast.PositionAdjustPairDefinition([], [], {}),
     )
     lookup.vfj_len = 0
+    # Coverage indices, for finding the index of a glyph or class quickly.
+    lookup.vfj_ids_1 = {}
+    lookup.vfj_ids_2 = {}
     lookups.append(lookup)
 
 
@@ -245,13 +243,15 @@ def _kern_pair(lookups, left, right, value, max_pairs=None, classes=[]):
             _start_pair_lookup(lookups, kind)
 
     lookup = lookups[-1]
-    if left not in lookup.pos.coverages_1:
+    id1 = lookup.vfj_ids_1.get(left)
+    if id1 is None:
         lookup.pos.coverages_1.append(left)
-    id1 = lookup.pos.coverages_1.index(left) + 1
+        id1 = lookup.vfj_ids_1[left] = len(lookup.pos.coverages_1)
 
-    if right not in lookup.pos.coverages_2:
+    id2 = lookup.vfj_ids_2.get(right)
+    if id2 is None:
         lookup.pos.coverages_2.append(right)
-    id2 = lookup.pos.coverages_2.index(right) + 1
+        id2 = lookup.vfj_ids_2[right] = len(lookup.pos.coverages_2)
 
     pos = ast.Pos(value, None, None, {}, {}, {})
     lookup.pos.adjust_pair[(id1, id2)] = (pos, nullpos)
@@ -265,49 +265,34 @@ def exportVoltKerning(font, max_pairs):
     for master in font.masters:
         classes = {k.name: k.names for k in master.kerning.classes}
 
-        # Get kerning pairs as a flat list.
-        pairs = []
+        # Sort kerning pairs into glyph pairs, pairs where the right side is
+        # a class, pairs where the left side is a class, and class pairs, and
+        # collect the used groups to avoid writing groups not used in kerning.
+        buckets = ([], [], [], [])
+        groups = set()
         for left in master.kerning.pairs:
             for right, value in master.kerning.pairs[left].items():
                 if ";" in value:
                     # This seems to be the Flag color applied to the pair in FL UI.
                     value = value.split(";")[0]
-                pairs.append(((left, right), otRound(float(value))))
+                value = otRound(float(value))
+                leftClass, rightClass = left.startswith("@"), right.startswith("@")
+                buckets[2 * leftClass + rightClass].append((left, right, value))
+                if leftClass:
+                    groups.add(left[1:])
+                if rightClass:
+                    groups.add(right[1:])
 
         lookups = []
 
-        # Write format 1 lookup for individual glyph pairs first.
-        _start_pair_lookup(lookups)
-        for (left, right), value in pairs:
-            if not left.startswith("@") and not right.startswith("@"):
-                _kern_pair(lookups, left, right, value, max_pairs, classes)
-
-        # Then write format 1 lookup for pairs where right side is a class.
-        _start_pair_lookup(lookups)
-        for (left, right), value in pairs:
-            if not left.startswith("@") and right.startswith("@"):
-                _kern_pair(lookups, left, right, value, max_pairs, classes)
-
-        # Then write format 1 lookup for pairs where left side is a class.
-        _start_pair_lookup(lookups)
-        for (left, right), value in pairs:
-            if left.startswith("@") and not right.startswith("@"):
-                _kern_pair(lookups, left, right, value, max_pairs, classes)
-
-        # Lastly write format 2 (class kerning).
-        _start_pair_lookup(lookups, "PPF2")
-        for (left, right), value in pairs:
-            if left.startswith("@") and right.startswith("@"):
+        # Write format 1 lookups for individual glyph pairs first, then for
+        # pairs where right side is a class, then for pairs where left side
+        # is a class, and lastly write format 2 (class kerning).
+        for kind, pairs in zip(("PPF1", "PPF1", "PPF1", "PPF2"), buckets):
+            _start_pair_lookup(lookups, kind)
+            for left, right, value in pairs:
                 _kern_pair(lookups, left, right, value, max_pairs, classes)
 
-        # Collect used groups to avoid writing groups not used in kerning.
-        groups = set()
-        for (left, right), value in pairs:
-            if left.startswith("@"):
-                groups.add(left[1:])
-            if right.startswith("@"):
-                groups.add(right[1:])
-
         _warn_overlapping_classes(master, groups)
 
         # Save groups file.
@@ -1,15 +1,104 @@
 import json
 import logging
+import os
+import re
 
 from datetime import datetime
 from functools import cached_property
 
 from fontTools.misc.transform import Identity
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 logging.basicConfig(format="%(levelname)s: %(message)s")
 log = logging.getLogger()
 
 
+def parseJSON(source):
+    """Parses JSON bytes, with orjson if it is installed."""
+    if orjson is not None:
+        return orjson.loads(source)
+    return json.loads(source)
+
+
+def loadJSON(path):
+    """Loads a JSON file, with orjson if it is installed."""
+    with open(path, "rb") as f:
+        return parseJSON(f.read())
+
+
+def dumpJSON(data, compact=False):
+    """Serializes data to JSON bytes, with orjson if it is installed. The
+    output is indented by two spaces, unless compact."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(data, option=0 if compact else orjson.OPT_INDENT_2)
+        except orjson.JSONEncodeError:
+            # E.g. integers that don’t fit in 64 bits.
+            pass
+    if compact:
+        return json.dumps(data, separators=(",", ":")).encode("utf-8")
+    return json.dumps(data, indent=2).encode("utf-8")
+
+
+# A JSON string, and text up to the next string or brace.
+STRING = rb'"[^"\\]*(?:\\.[^"\\]*)*"'
+OTHER = rb'[^"{}]*'
+
+
+def recordPattern(depth):
+    """Returns a regular expression pattern matching JSON objects nested up to
+    depth levels deep."""
+    pattern = rb"\{" + OTHER + rb"(?:" + STRING + OTHER + rb")*\}"
+    for _ in range(depth - 1):
+        item = rb"(?:" + STRING + rb"|" + pattern + rb")"
+        pattern = rb"\{" + OTHER + rb"(?:" + item + OTHER + rb")*\}"
+    return pattern
+
+
+GLYPHS_RE = re.compile(rb'"glyphs"\s*:\s*\[')
+GLYPH_RE = re.compile(rb"\s*(" + recordPattern(16) + rb")")
+BRACE_RE = re.compile(OTHER + rb"(?:" + STRING + OTHER + rb")*([{}])")
+COMMA_RE = re.compile(rb"\s*,")
+ARRAY_END_RE = re.compile(rb"\s*\]")
+
+
+def glyphSpans(source):
+    """Returns the span of the font glyphs array contents and the span of each
+    glyph record in the bytes of a VFJ file, or None if they could not be
+    located."""
+    match = GLYPHS_RE.search(source)
+    if not match:
+        return None
+
+    # Make sure these are the font glyphs, in the font object of the root
+    # object, not some other “glyphs” key.
+    depth = 0
+    for brace in BRACE_RE.finditer(source, 0, match.start()):
+        depth += 1 if brace.group(1) == b"{" else -1
+    if depth != 2:
+        return None
+
+    spans = []
+    pos = match.end()
+    while not (end := ARRAY_END_RE.match(source, pos)):
+        if spans:
+            comma = COMMA_RE.match(source, pos)
+            if not comma:
+                return None
+            pos = comma.end()
+        # Records nested deeper than VFJ glyphs ever are don’t match.
+        record = GLYPH_RE.match(source, pos)
+        if not record:
+            return None
+        spans.append(record.span(1))
+        pos = record.end()
+    return (match.end(), end.end() - 1), spans
+
+
 class Transformation:
     def __init__(self, data):
         self.data = data
@@ -47,8 +136,9 @@ class Component:
 
 
 class Anchor:
-    def __init__(self, data):
+    def __init__(self, data, glyph=None):
         self.data = data
+        self.glyph = glyph
         self.name = data.get("name")
         self._x, self._y = [float(v) for v in data.get("point", "0 0").split()]
 
@@ -60,6 +150,8 @@ class Anchor:
     def x(self, x):
         self._x = x
         self.data["point"] = f"{x} {self.y}"
+        if self.glyph is not None:
+            self.glyph.modified = True
 
     @property
     def y(self):
@@ -69,6 +161,8 @@ class Anchor:
     def y(self, y):
         self._y = y
         self.data["point"] = f"{self.x} {y}"
+        if self.glyph is not None:
+            self.glyph.modified = True
 
     def __repr__(self):
         name, x, y = self.name, self.x, self.y
@@ -76,13 +170,19 @@ class Anchor:
 
 
 class Anchors:
-    def __init__(self, data):
+    def __init__(self, data, glyph=None):
         self.data = data
-        self.anchors = {a.get("name"): Anchor(a) for a in data}
+        self.glyph = glyph
+        self.anchors = {a.get("name"): Anchor(a, glyph) for a in data}
 
     def addAnchor(self, data):
-        self[data["name"]] = Anchor(data)
+        self[data["name"]] = Anchor(data, self.glyph)
         self.data.append(data)
+        if self.glyph is not None:
+            self.glyph.modified = True
+
+    def keys(self):
+        return self.anchors.keys()
 
     def __len__(self):
         return len(self.anchors)
@@ -104,6 +204,108 @@ class Anchors:
         return repr(list(self.anchors.values()))
 
 
+class AnchorStore:
+    """Anchor coordinates of a font in NumPy arrays, one per layer, for bulk
+    edits. The arrays are read from the anchor data directly, and written back
+    to it with commit(), which Font.save() calls. Anchor objects of changed
+    layers are rebuilt on next access, so anchors should not be edited through
+    them while the store is in use."""
+
+    def __init__(self, font):
+        import numpy as np
+
+        self.font = font
+        # Names of the glyphs whose data was changed by the store.
+        self.changed = set()
+
+        # Anchor records and the names of their glyphs, by layer name. Glyph
+        # and Layer objects are not needed, so they are not built.
+        self.records = {}
+        self.glyphs = {}
+        for glyphName, glyph in font.glyphs.records.items():
+            layers = {l.get("name"): l for l in glyph.get("layers", [])}
+            for name, layer in layers.items():
+                if "anchors" not in layer:
+                    self.changed.add(glyphName)
+                anchors = layer.setdefault("anchors", [])
+                self.records.setdefault(name, []).extend(anchors)
+                self.glyphs.setdefault(name, []).extend([glyphName] * len(anchors))
+
+        self.coordinates = {}
+        for name, records in self.records.items():
+            points = " ".join(r.get("point", "0 0") for r in records).split()
+            self.coordinates[name] = np.array(points, dtype=float).reshape(-1, 2)
+
+        # Layers changed since the last commit, and whether their coordinates
+        # were rounded to integers.
+        self.modified = {}
+
+    def transform(self, matrix, layers=None, round=False):
+        """Transforms the anchors of the given layers, or of all layers, by a
+        fontTools Transform or a 6-tuple affine matrix. With round, the new
+        coordinates are rounded like otRound()."""
+        import numpy as np
+
+        xx, xy, yx, yy, dx, dy = matrix
+        for name in self.coordinates if layers is None else layers:
+            points = self.coordinates[name]
+            x, y = points[:, 0], points[:, 1]
+            points = np.column_stack((xx * x + yx * y + dx, xy * x + yy * y + dy))
+            if round:
+                points = np.floor(points + 0.5)
+            self.coordinates[name] = points
+            self.modified[name] = round
+
+    def commit(self):
+        """Writes the changed coordinates back to the anchor data."""
+        for name, rounded in self.modified.items():
+            points = self.coordinates[name]
+            points = points.astype(int) if rounded else points
+            for record, (x, y) in zip(self.records[name], points.tolist()):
+                record["point"] = f"{x} {y}"
+            for glyphName in set(self.glyphs[name]):
+                self.changed.add(glyphName)
+                glyph = self.font.glyphs.glyphs.get(glyphName)
+                layer = glyph.layers.layers.get(name) if glyph else None
+                if layer is not None:
+                    layer.__dict__.pop("anchors", None)
+        self.modified = {}
+
+
+def propagationOrder(layers):
+    """Returns the layers whose anchors need propagating, each after the
+    component layers it depends on, in the order a depth-first walk from the
+    given layers visits them. Component cycles are reported and broken."""
+    order = []
+    visiting = set()
+    done = set()
+    for root in layers:
+        if root._anchorsPropagated or root in visiting:
+            continue
+        # Iterative, so that deeply nested components don’t hit the recursion
+        # limit.
+        visiting.add(root)
+        stack = [(root, iter(root.componentLayers))]
+        while stack:
+            layer, components = stack[-1]
+            for _, component in components:
+                if component in visiting:
+                    if component not in done:
+                        log.warning(
+                            f"Component cycle in glyph '{layer.glyph.name}' "
+                            f"layer '{layer.name}'"
+                        )
+                elif not component._anchorsPropagated:
+                    visiting.add(component)
+                    stack.append((component, iter(component.componentLayers)))
+                    break
+            else:
+                stack.pop()
+                done.add(layer)
+                order.append(layer)
+    return order
+
+
 class Layer:
     def __init__(self, data, glyph=None):
         self.data = data
@@ -113,73 +315,109 @@ class Layer:
 
         elements = data.get("elements", [])
         self.components = [Component(e) for e in elements if e.get("component")]
-        self.contours = []
-        for element in elements:
+
+        self._anchorsPropagated = False
+
+    @cached_property
+    def contours(self):
+        # Extracted on first access, most tools only need anchors.
+        contours = []
+        for element in self.data.get("elements", []):
             elementData = element.get("elementData", {})
             if isinstance(elementData, dict):
-                contours = elementData.get("contours", [])
-                self.contours.extend(c["nodes"] for c in contours)
+                contours.extend(c["nodes"] for c in elementData.get("contours", []))
             else:
                 log.warning(
-                    f"Unsupported element reference in glyph '{glyph.name}' "
+                    f"Unsupported element reference in glyph '{self.glyph.name}' "
                     f"layer '{self.name}': {elementData}"
                 )
-
-        self._anchorsPropagated = False
+        return contours
 
     @cached_property
     def anchors(self):
-        return Anchors(self.data.setdefault("anchors", []))
+        if "anchors" not in self.data and self.glyph is not None:
+            self.glyph.modified = True
+        return Anchors(self.data.setdefault("anchors", []), self.glyph)
 
-    def _addAnchors(self, name):
+    @cached_property
+    def componentLayers(self):
+        """The components of the layer, with the same named layers of their
+        glyphs."""
         font = self.glyph.font
+        layers = []
+        for component in self.components:
+            glyph = font[component.name]
+            if glyph is None:
+                log.warning(
+                    f"Component '{component.name}' of glyph '{self.glyph.name}' "
+                    "is missing from font"
+                )
+                continue
+            layer = glyph.layers[self.name]
+            if layer is None:
+                log.warning(
+                    f"Component '{component.name}' of glyph '{self.glyph.name}' "
+                    f"has no layer '{self.name}'"
+                )
+                continue
+            layers.append((component, layer))
+        return layers
 
+    def _addAnchors(self, name):
         # Collect anchors from components.
         anchors = []
-        for component in self.components:
-            layer = font[component.name].layers[self.name]
-            for anchor in layer.anchors:
-                if anchor.name == name:
-                    x, y = component.transform.transformPoint(anchor.x, anchor.y)
-                    anchors.append((x, y))
-                    break
+        for component, layer in self.componentLayers:
+            anchor = layer.anchors[name]
+            if anchor is not None:
+                x, y = component.transform.transformPoint(anchor.x, anchor.y)
+                anchors.append((x, y))
 
         # For multiple mkmk anchors, keep only the top most or bottom most one.
         if name.endswith(".mkmk"):
             anchors = [max(anchors, key=lambda x: abs(x[1]))]
 
+        added = []
         for i, (x, y) in enumerate(anchors):
             n = name
             if len(anchors) > 1:
                 # Multiple anchors, turn into ligature anchor.
                 n = f"{name}_{i + 1}"
             self.anchors.addAnchor(dict(name=n, point=f"{x:g} {y:g}"))
+            added.append(n)
+        return added
 
-    def propagateAnchors(self):
-        if self._anchorsPropagated:
-            return
+    def _propagateAnchors(self):
+        """Adds the anchors of the components, which must have been propagated
+        already."""
+        from bisect import bisect_left, insort
 
         self._anchorsPropagated = True
-        font = self.glyph.font
 
         # Collect anchor names.
         names = set()
-        for component in self.components:
-            layer = font[component.name].layers[self.name]
-            layer.propagateAnchors()
-            names |= {a.name for a in layer.anchors}
+        for _, layer in self.componentLayers:
+            names |= layer.anchors.keys()
+
+        # Sorted anchor names, for finding anchors starting with a name.
+        existing = sorted(self.anchors.keys())
 
         # Add anchors.
         for name in sorted(names):
             # Skip mark anchors, or base anchors with corresponding mkmk ones.
             if name.startswith("_") or f"{name}.mkmk" in names:
                 continue
-            if not any(a.name.startswith(name) for a in self.anchors):
-                self._addAnchors(name)
+            i = bisect_left(existing, name)
+            if i == len(existing) or not existing[i].startswith(name):
+                for added in self._addAnchors(name):
+                    insort(existing, added)
 
         if self.anchors and "anchors" not in self.data:
             self.data["anchors"] = self.anchors.data
 
+    def propagateAnchors(self):
+        for layer in propagationOrder([self]):
+            layer._propagateAnchors()
+
     def __repr__(self):
         return f'<{self.__class__.__name__} "{self.name}">'
 
@@ -187,23 +425,33 @@ class Layer:
 class Layers:
     def __init__(self, data, glyph=None):
         self.data = data
-        self.layers = {l.get("name"): Layer(l, glyph) for l in data}
+        self.glyph = glyph
+        # Layer objects are built on first access.
+        self.records = {l.get("name"): l for l in data}
+        self.layers = {}
+
+    def load(self):
+        for name in self.records:
+            self[name]
 
     def __len__(self):
-        return len(self.layers)
+        return len(self.records)
 
     def __contains__(self, name):
-        return name in self.layers
+        return name in self.records
 
     def __getitem__(self, name):
-        return self.layers.get(name)
+        layer = self.layers.get(name)
+        if layer is None and name in self.records:
+            layer = self.layers[name] = Layer(self.records[name], self.glyph)
+        return layer
 
     def __iter__(self):
-        for name in self.layers:
+        for name in self.records:
             yield self[name]
 
     def __repr__(self):
-        return repr(list(self.layers.values()))
+        return repr(list(self))
 
 
 class Glyph:
@@ -212,17 +460,51 @@ class Glyph:
         self.font = font
         self.name = data.get("name")
         self.openTypeGlyphClass = data.get("openTypeGlyphClass")
+        # Whether the glyph data was changed since loading.
+        self.modified = False
         self.layers = Layers(data.get("layers", []), self)
         self.unicode = [int(u, 16) for u in data.get("unicode", "").split(",") if u]
 
     def propagateAnchors(self):
-        for layer in self.layers:
-            layer.propagateAnchors()
+        for layer in propagationOrder(list(self.layers)):
+            layer._propagateAnchors()
 
     def __repr__(self):
         return f'<{self.__class__.__name__} "{self.name}">'
 
 
+class Glyphs:
+    def __init__(self, data, font=None):
+        self.data = data
+        self.font = font
+        # Glyph objects are built on first access.
+        self.records = {g.get("name"): g for g in data}
+        self.glyphs = {}
+
+    def load(self):
+        for glyph in self:
+            glyph.layers.load()
+
+    def __len__(self):
+        return len(self.records)
+
+    def __contains__(self, name):
+        return name in self.records
+
+    def __getitem__(self, name):
+        glyph = self.glyphs.get(name)
+        if glyph is None and name in self.records:
+            glyph = self.glyphs[name] = Glyph(self.records[name], self.font)
+        return glyph
+
+    def __iter__(self):
+        for name in self.records:
+            yield self[name]
+
+    def __repr__(self):
+        return repr(list(self))
+
+
 class KerningClass:
     def __init__(self, data):
         self.name = data.get("name")
@@ -264,30 +546,107 @@ class Info:
 
 
 class Font:
-    def __init__(self, path):
-        with open(path) as f:
-            data = json.load(f)
+    def __init__(self, path, lazy=False):
+        """Loads a VFJ file. With lazy, glyphs and their layers are only
+        built when accessed, which is much faster when only a few glyphs
+        are used."""
+        data = loadJSON(path)
         self.data = data
+        # The file is read again when saving, see _dumpIncremental().
+        self._path = path
+        self._stat = self._fileStat(path)
         self.version = data.get("version")
         assert self.version == 8, f"Unsupported VFJ version: {self.version}"
 
         data = data.get("font")
 
-        self.glyphs = {g.get("name"): Glyph(g, self) for g in data.get("glyphs")}
+        self.glyphs = Glyphs(data.get("glyphs"), self)
         assert len(self.glyphs) == data.get("glyphsCount")
+        if not lazy:
+            self.glyphs.load()
 
         self.masters = [Master(m, self) for m in data.get("masters", [])]
 
         self.info = Info(data.get("info"))
         self.upm = data.get("upm", 1000)
 
-    def propagateAnchors(self):
-        for glyph in self:
-            glyph.propagateAnchors()
+        self._anchorStore = None
 
-    def save(self, path):
-        with open(path, "w") as f:
-            json.dump(self.data, f, indent=2)
+    def propagateAnchors(self):
+        layers = [layer for glyph in self for layer in glyph.layers]
+        for layer in propagationOrder(layers):
+            layer._propagateAnchors()
+
+    def anchorStore(self):
+        """Returns the NumPy backed anchor store of the font, for bulk edits of
+        anchor coordinates. Requires NumPy."""
+        if self._anchorStore is None:
+            self._anchorStore = AnchorStore(self)
+        return self._anchorStore
+
+    @staticmethod
+    def _fileStat(path):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_size, stat.st_mtime_ns
+
+    def _dumpIncremental(self, compact):
+        """Serializes the font as a list of chunks, reusing the original text
+        of the unmodified glyphs, or returns None if that is not possible."""
+        # The file is read again, unless it changed since it was loaded.
+        if self._stat is None or self._fileStat(self._path) != self._stat:
+            return None
+        with open(self._path, "rb") as f:
+            source = f.read()
+        # Only files with the same layout can be spliced.
+        if compact != (b"\n" not in source[: source.find(b'"')]):
+            return None
+        located = glyphSpans(source)
+        glyphs = self.data["font"]["glyphs"]
+        if located is None or len(glyphs) != len(located[1]):
+            return None
+        (start, end), spans = located
+
+        # The rest of the document is serialized with a placeholder for the
+        # glyphs, as it is small and might have been changed directly.
+        placeholder = "\0glyphs\0"
+        font = dict(self.data["font"], glyphs=placeholder)
+        document = dumpJSON(dict(self.data, font=font), compact)
+        head, tail = document.split(dumpJSON(placeholder), 1)
+
+        modified = {id(g.data) for g in self.glyphs.glyphs.values() if g.modified}
+        if self._anchorStore is not None:
+            records = self.glyphs.records
+            modified |= {id(records[name]) for name in self._anchorStore.changed}
+        view = memoryview(source)
+        chunks = [head, b"["]
+        for glyph, (glyphStart, glyphEnd) in zip(glyphs, spans):
+            if id(glyph) not in modified:
+                continue
+            record = dumpJSON(glyph, compact)
+            if not compact:
+                # Indent like the original record.
+                line = source.rfind(b"\n", 0, glyphStart) + 1
+                indent = source[line:glyphStart]
+                record = record.replace(b"\n", b"\n" + indent)
+            chunks += [view[start:glyphStart], record]
+            start = glyphEnd
+        chunks += [view[start:end], b"]", tail]
+        return chunks
+
+    def save(self, path, compact=False):
+        """Saves the font to a VFJ file. Compact files have no indentation,
+        and are meant for intermediate files in scripted pipelines. Glyphs
+        that were not modified are written as they were read."""
+        if self._anchorStore is not None:
+            self._anchorStore.commit()
+        chunks = self._dumpIncremental(compact)
+        if chunks is None:
+            chunks = [dumpJSON(self.data, compact)]
+        with open(path, "wb") as f:
+            f.writelines(chunks)
 
     def __len__(self):
         return len(self.glyphs)
@@ -296,11 +655,10 @@ class Font:
         return name in self.glyphs
 
     def __getitem__(self, name):
-        return self.glyphs.get(name)
+        return self.glyphs[name]
 
     def __iter__(self):
-        for name in self.glyphs:
-            yield self[name]
+        return iter(self.glyphs)
 
     def __repr__(self):
         return f'<{self.__class__.__name__} "{self.info.tfn}">'